@@ -0,0 +1,154 @@
+import heapq
+import re
+from bisect import bisect_left
+from datetime import timezone
+
+_AMOUNT_RE = re.compile(r"\$?\s*([\d][\d,]*(?:\.\d+)?)\s*([KMBT])?\b", re.IGNORECASE)
+_AMOUNT_SUFFIXES = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def parse_amount_usd(amount):
+    """Parse a free-text amount such as "$1.5B" or "$89K" into USD; None if unparseable"""
+    if not amount:
+        return None
+    match = _AMOUNT_RE.search(amount)
+    if match is None:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    suffix = match.group(2)
+    if suffix:
+        value *= _AMOUNT_SUFFIXES[suffix.upper()]
+    return value
+
+
+def naive_utc(value):
+    """Alert timestamps are naive UTC; convert aware query bounds to match"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _amount(alert):
+    return alert.amount_usd if alert.amount_usd is not None else 0.0
+
+
+class _RangeMax:
+    """
+    Sparse table over a list of amounts: the position of the largest
+    amount in any slice ``[lo, hi)`` in O(1), after O(n log n) setup.
+    """
+
+    def __init__(self, amounts):
+        self._amounts = amounts
+        self._levels = [list(range(len(amounts)))]
+        width = 1
+        while 2 * width <= len(amounts):
+            previous = self._levels[-1]
+            self._levels.append([
+                self._larger(previous[i], previous[i + width])
+                for i in range(len(amounts) - 2 * width + 1)
+            ])
+            width *= 2
+
+    def _larger(self, i, j):
+        # Ties go to the earlier position, like a stable sort
+        return i if self._amounts[i] >= self._amounts[j] else j
+
+    def argmax(self, lo, hi):
+        level = (hi - lo).bit_length() - 1
+        row = self._levels[level]
+        return self._larger(row[lo], row[hi - (1 << level)])
+
+
+class AlertIndex:
+    """
+    Immutable in-memory index over scam alerts.
+
+    Alerts are kept in timestamp order in buckets keyed by
+    ``(severity, source)``, where ``None`` means "any", so every filter
+    combination maps to one sorted bucket and a query costs a bisect plus a
+    slice: O(log n + k). Amount-sorted lists serve all-time top-N loss
+    queries; time-bounded ones ("top 10 this week") use a range-max table
+    over the bucket and cost O(log n + k log k). ``warm`` builds those
+    tables up front; otherwise each is built on first use. Nothing is
+    rescanned or resorted per request.
+    """
+
+    def __init__(self, alerts):
+        by_time = sorted(alerts, key=lambda a: a.timestamp)
+        self._buckets = {}  # (severity, source) -> (timestamps, alerts)
+        for alert in by_time:
+            for key in ((None, None), (alert.severity, None),
+                        (None, alert.source), (alert.severity, alert.source)):
+                self._buckets.setdefault(key, ([], []))
+                times, bucket = self._buckets[key]
+                times.append(alert.timestamp)
+                bucket.append(alert)
+
+        self._by_amount = sorted(alerts, key=_amount, reverse=True)
+        self._severity_by_amount = {}
+        for alert in self._by_amount:
+            self._severity_by_amount.setdefault(alert.severity, []).append(alert)
+        self._range_max = {}  # severity -> _RangeMax over its time-ordered bucket
+
+    def warm(self):
+        """Build the range-max table of every severity bucket now; returns self"""
+        for severity in (None, *self._severity_by_amount):
+            self._range_max_for(severity)
+        return self
+
+    def _range_max_for(self, severity):
+        range_max = self._range_max.get(severity)
+        if range_max is None:
+            _, alerts = self._buckets.get((severity, None), ([], []))
+            range_max = self._range_max[severity] = _RangeMax([_amount(a) for a in alerts])
+        return range_max
+
+    def __len__(self):
+        return len(self._buckets.get((None, None), ((), ()))[1])
+
+    def _bounds(self, severity, source, since, until):
+        times, alerts = self._buckets.get((severity, source), ([], []))
+        since, until = naive_utc(since), naive_utc(until)
+        start = bisect_left(times, since) if since is not None else 0
+        end = bisect_left(times, until) if until is not None else len(times)
+        return alerts, start, end
+
+    def window(self, severity=None, source=None, since=None, until=None):
+        """Alerts in [since, until), oldest first; O(log n) to locate the window"""
+        alerts, start, end = self._bounds(severity, source, since, until)
+        return alerts[start:end]
+
+    def recent(self, limit, offset=0, severity=None, source=None, since=None, until=None):
+        """Newest-first page of alerts in the window, skipping the ``offset`` newest"""
+        alerts, start, end = self._bounds(severity, source, since, until)
+        end = max(start, end - offset)
+        return alerts[max(start, end - limit):end][::-1]
+
+    def largest(self, limit, severity=None, since=None, until=None):
+        """Top ``limit`` alerts by USD amount, optionally within a time window"""
+        if since is None and until is None:
+            if severity is None:
+                return self._by_amount[:limit]
+            return self._severity_by_amount.get(severity, [])[:limit]
+
+        alerts, start, end = self._bounds(severity, None, since, until)
+        range_max = self._range_max_for(severity)
+
+        # Best-first over sub-slices: taking the maximum of a slice splits
+        # it in two, so k answers need k range-max lookups
+        candidates = []
+
+        def push(lo, hi):
+            if lo < hi:
+                i = range_max.argmax(lo, hi)
+                heapq.heappush(candidates, (-_amount(alerts[i]), i, lo, hi))
+
+        push(start, end)
+        top = []
+        while candidates and len(top) < limit:
+            _, i, lo, hi = heapq.heappop(candidates)
+            top.append(alerts[i])
+            push(lo, i)
+            push(i + 1, hi)
+        return top
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TITLE_WORD_RE = re.compile(r"[a-z0-9]+")
+_TITLE_AMOUNT_RE = re.compile(r"\$\s*\d[\d,.]*\s*[kmbt]?\b")
+# Words that say nothing about which incident a title describes
+_FILLER_WORDS = frozenset({
+    "a", "an", "and", "in", "of", "on", "the", "to", "via",
+    "lost", "loss", "losses", "stolen", "drained", "total",
+})
+# Share of title words two reports of one incident must have in common
+TITLE_SIMILARITY = 0.5
+
+
+def alert_content_hash(alert):
+    """
+    Stable content hash of an alert, used as its document identity.
+
+    Built from the normalized title, amount and link but not the source,
+    so only byte-for-byte repeats (after case and whitespace) hash alike;
+    reworded reports of one incident are matched by ``incident_key`` and
+    ``same_incident`` instead.
+    """
+    parts = (alert.title, alert.amount_lost, alert.link)
+    normalized = "\x1f".join(_WHITESPACE_RE.sub(" ", p.strip().lower()) for p in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+def incident_key(alert):
+    """Reports of one incident share the loss amount and the article they cite"""
+    amount = alert.amount_usd if alert.amount_usd is not None else alert.amount_lost.strip().lower()
+    return alert.link.strip().lower().rstrip("/"), amount
+
+
+def title_words(title):
+    """Distinctive words of a title: the amount and filler words are dropped"""
+    title = _TITLE_AMOUNT_RE.sub(" ", title.lower())
+    return frozenset(_TITLE_WORD_RE.findall(title)) - _FILLER_WORDS
+
+
+def same_incident(words, other_words):
+    """Whether two titles with the same ``incident_key`` describe one incident"""
+    union = words | other_words
+    if not union:
+        return True
+    return len(words & other_words) / len(union) >= TITLE_SIMILARITY
+
+
+class AlertStore:
+    """
+    Deduplicating, incremental scam alert store backed by a Mongo collection.
+
+    ``ingest`` skips alerts already stored, either as exact repeats (same
+    content hash) or as another source's report of a stored incident: same
+    amount and link, and titles sharing at least ``TITLE_SIMILARITY`` of
+    their words. The first report seen is kept. New alerts are upserted
+    with ``$setOnInsert``, so re-ingesting the same source data is
+    idempotent and first-seen timestamps stay stable. The stored alerts
+    are mirrored in memory: they are loaded from Mongo once on first use
+    and then kept current by ingestion, so reads never regenerate or
+    re-query the whole feed. Alerts older than ``retention`` are aged out
+    here and by the TTL index on ``ingested_at``.
+    """
+
+    def __init__(self, collection, model, retention=timedelta(days=30), max_alerts=10000):
+        self.collection = collection
+        self.model = model
+        self.retention = retention
+        self.max_alerts = max_alerts
+        self._alerts = {}  # content hash -> (ingested_at, alert)
+        self._incidents = {}  # incident key -> {content hash: title words}
+        self._loaded = False
+        self.duplicates = 0  # reworded reports of stored incidents skipped
+
+    def _remember(self, content_hash, ingested_at, alert):
+        self._alerts[content_hash] = (ingested_at, alert)
+        self._incidents.setdefault(incident_key(alert), {})[content_hash] = title_words(alert.title)
+
+    def _forget(self, content_hash):
+        _, alert = self._alerts.pop(content_hash)
+        key = incident_key(alert)
+        reports = self._incidents[key]
+        del reports[content_hash]
+        if not reports:
+            del self._incidents[key]
+
+    def _is_known(self, content_hash, alert):
+        if content_hash in self._alerts:
+            return True
+        words = title_words(alert.title)
+        reports = self._incidents.get(incident_key(alert), {})
+        return any(same_incident(words, other) for other in reports.values())
+
+    async def _load(self):
+        cutoff = datetime.utcnow() - self.retention
+        cursor = self.collection.find(
+            {"ingested_at": {"$gte": cutoff}}, {"_id": 0}
+        ).sort("timestamp", -1).limit(self.max_alerts)
+        async for doc in cursor:
+            content_hash = doc.pop("hash")
+            ingested_at = doc.pop("ingested_at")
+            self._remember(content_hash, ingested_at, self.model(**doc))
+        self._loaded = True
+        logger.info(f"Loaded {len(self._alerts)} scam alerts from the store")
+
+    def _expire(self):
+        cutoff = datetime.utcnow() - self.retention
+        expired = [h for h, (ingested_at, _) in self._alerts.items() if ingested_at < cutoff]
+        for content_hash in expired:
+            self._forget(content_hash)
+
+    async def ingest(self, alerts):
+        """Persist alerts not seen before; returns how many were new"""
+        if not self._loaded:
+            await self._load()
+        self._expire()
+
+        now = datetime.utcnow()
+        new = {}
+        for alert in alerts:
+            content_hash = alert_content_hash(alert)
+            if self._is_known(content_hash, alert):
+                if content_hash not in self._alerts:
+                    self.duplicates += 1
+                continue
+            new[content_hash] = alert
+            # Later alerts in this batch are checked against this one too
+            self._remember(content_hash, now, alert)
+        if not new:
+            return 0
+
+        try:
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {"hash": content_hash},
+                    {"$setOnInsert": {**alert.dict(), "hash": content_hash, "ingested_at": now}},
+                    upsert=True,
+                )
+                for content_hash, alert in new.items()
+            ], ordered=False)
+        except Exception:
+            # Not stored: let the next refresh try these alerts again
+            for content_hash in new:
+                self._forget(content_hash)
+            raise
+        logger.info(f"Ingested {len(new)} new scam alerts")
+        return len(new)
+
+    def alerts(self):
+        """Every stored alert that has not aged out"""
+        return [alert for _, alert in self._alerts.values()]
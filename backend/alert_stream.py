@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import secrets
+from collections import OrderedDict, deque
+
+from fastapi.encoders import jsonable_encoder
+
+from scam_feed import alert_identity
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event, event_id, data):
+    """Encode one Server-Sent Event; ``data`` is already-serialized JSON bytes"""
+    return b"event: %s\nid: %s\ndata: %s\n\n" % (
+        event.encode("ascii"), str(event_id).encode("ascii"), data)
+
+
+HEARTBEAT = b": heartbeat\n\n"
+
+
+class AlertBroadcaster:
+    """
+    Single in-memory fan-out point for newly ingested scam alerts.
+
+    Every new alert is encoded once into a bounded ring buffer of events.
+    Subscribers do not get their own queue: they all wait on one shared
+    asyncio.Event, then read whatever is newer than their last event id from
+    the buffer. That keeps an idle connection down to one suspended
+    coroutine, and lets clients resume with Last-Event-ID.
+
+    Event ids are ``<epoch>-<counter>`` where the epoch is random per
+    broadcaster: a Last-Event-ID issued by another worker, or by this one
+    before a restart, never matches and gets a fresh snapshot instead of a
+    resume from an unrelated counter.
+    """
+
+    def __init__(self, history=256, heartbeat_interval=15.0, max_seen=10000):
+        self.heartbeat_interval = heartbeat_interval
+        self.max_seen = max_seen
+        self._events = deque(maxlen=history)  # (event_id, encoded event)
+        self._last_id = 0
+        self.epoch = secrets.token_hex(4)
+        self._seen = OrderedDict()
+        self._changed = asyncio.Event()
+        self.subscribers = 0
+
+    def publish_snapshot(self, snapshot):
+        """Feed listener: broadcast alerts not present in any earlier snapshot"""
+        initial_load = not self._seen
+        new_alerts = []
+        # Snapshots are newest first; publish oldest first so ids follow time
+        for alert in reversed(snapshot.alerts):
+            identity = alert_identity(alert)
+            if identity in self._seen:
+                self._seen.move_to_end(identity)
+                continue
+            self._seen[identity] = None
+            new_alerts.append(alert)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+
+        if initial_load or not new_alerts:
+            return
+        for alert in new_alerts:
+            self._last_id += 1
+            data = json.dumps(jsonable_encoder(alert), separators=(",", ":")).encode("utf-8")
+            event = format_event("alert", self._event_id(self._last_id), data)
+            self._events.append((self._last_id, event))
+        self._wake()
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _event_id(self, counter):
+        return f"{self.epoch}-{counter}"
+
+    def _counter(self, last_event_id):
+        """Counter of an event id issued by this broadcaster, else None"""
+        epoch, _, counter = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not counter.isdigit():
+            return None
+        return int(counter)
+
+    def _can_resume(self, last_event_id):
+        last_event_id = self._counter(last_event_id)
+        if last_event_id is None or last_event_id > self._last_id:
+            return False
+        if last_event_id == self._last_id:
+            return True
+        return bool(self._events) and self._events[0][0] <= last_event_id + 1
+
+    async def stream(self, current_snapshot, last_event_id=None):
+        """
+        Yield SSE bytes for one subscriber.
+
+        ``current_snapshot`` is an async callable returning the current feed
+        snapshot; it is sent on connect unless the client can resume from
+        the ring buffer.
+        """
+        self.subscribers += 1
+        try:
+            yield b"retry: 5000\n\n"
+            if self._can_resume(last_event_id):
+                last_id = self._counter(last_event_id)
+            else:
+                snapshot = await current_snapshot()
+                last_id = self._last_id
+                yield format_event("snapshot", self._event_id(last_id), snapshot.body)
+
+            while True:
+                if self._last_id > last_id:
+                    for event_id, payload in list(self._events):
+                        if event_id > last_id:
+                            yield payload
+                    last_id = self._last_id
+                    continue
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self.subscribers -= 1
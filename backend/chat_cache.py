@@ -0,0 +1,123 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(message):
+    """Reduce a chat message to a cache key: lowercase, no punctuation, single spaces"""
+    message = _PUNCTUATION_RE.sub(" ", message.lower())
+    return _WHITESPACE_RE.sub(" ", message).strip()
+
+
+def _entry_size(key, value):
+    """Rough in-memory footprint of a cached answer, in bytes"""
+    size = len(key) + len(value.get("response", ""))
+    size += sum(len(r) for r in value.get("recommendations", []))
+    return size
+
+
+class ChatResponseCache:
+    """
+    LRU + TTL cache for upstream chat answers, keyed on the normalized prompt.
+
+    Entries are evicted least-recently-used first when either ``max_entries``
+    or ``max_bytes`` is exceeded. When a Mongo ``collection`` is given, answers
+    are also written there so cache hits survive restarts.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, max_bytes=8 * 1024 * 1024,
+                 collection=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.collection = collection
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, expires_at):
+        if key in self._entries:
+            self._evict(key)
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+            self.evictions += 1
+
+    async def get(self, message):
+        key = normalize_prompt(message)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._evict(key)
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one(
+                    {"key": key, "expires_at": {"$gt": datetime.utcnow()}},
+                    {"_id": 0, "response": 1, "recommendations": 1, "expires_at": 1}
+                )
+            except Exception as e:
+                logger.warning(f"Chat cache lookup failed: {e}")
+                doc = None
+            if doc:
+                value = {"response": doc["response"], "recommendations": doc["recommendations"]}
+                remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                self._store(key, value, time.monotonic() + remaining)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, message, response, recommendations):
+        key = normalize_prompt(message)
+        value = {"response": response, "recommendations": list(recommendations)}
+        self._store(key, value, time.monotonic() + self.ttl_seconds)
+
+        if self.collection is not None:
+            try:
+                await self.collection.update_one(
+                    {"key": key},
+                    {"$set": {
+                        **value,
+                        "key": key,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                    }},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.warning(f"Chat cache write failed: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "persistent": self.collection is not None,
+        }
@@ -0,0 +1,120 @@
+import logging
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec(NamedTuple):
+    """Declarative description of one Mongo index"""
+    name: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    def options(self):
+        options = {"name": self.name, "background": True}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return options
+
+
+def _retention_index(env_var, field="timestamp"):
+    """Optional TTL index driven by a ``*_RETENTION_DAYS`` environment variable"""
+    days = os.environ.get(env_var)
+    if not days:
+        return []
+    return [IndexSpec(f"{field}_ttl", [(field, 1)], expire_after_seconds=int(float(days) * 86400))]
+
+
+def declared_indexes():
+    """Indexes every collection is expected to have, keyed by collection name"""
+    return {
+        "status_checks": [
+            IndexSpec("id_unique", [("id", 1)], unique=True),
+            IndexSpec("timestamp_id", [("timestamp", -1), ("id", -1)]),
+            IndexSpec("client_name_timestamp_id", [("client_name", 1), ("timestamp", -1), ("id", -1)]),
+        ] + _retention_index("STATUS_CHECK_RETENTION_DAYS"),
+        "chat_messages": [
+            IndexSpec("id_unique", [("id", 1)], unique=True),
+            IndexSpec("timestamp", [("timestamp", -1)]),
+            IndexSpec("email_timestamp_id", [("user_info.email", 1), ("timestamp", -1), ("id", -1)]),
+        ] + _retention_index("CHAT_RETENTION_DAYS"),
+        "ai_responses": [
+            IndexSpec("id_unique", [("id", 1)], unique=True),
+            IndexSpec("user_id", [("user_id", 1)]),
+            IndexSpec("timestamp", [("timestamp", -1)]),
+        ] + _retention_index("CHAT_RETENTION_DAYS"),
+        "scam_alerts": [
+            IndexSpec("hash_unique", [("hash", 1)], unique=True),
+            IndexSpec("timestamp", [("timestamp", -1)]),
+            IndexSpec("ingested_at_ttl", [("ingested_at", 1)],
+                      expire_after_seconds=int(float(os.environ.get("SCAM_ALERT_RETENTION_DAYS", "30")) * 86400)),
+        ],
+        "chat_response_cache": [
+            IndexSpec("key_unique", [("key", 1)], unique=True),
+            IndexSpec("expires_at_ttl", [("expires_at", 1)], expire_after_seconds=0),
+        ],
+    }
+
+
+def _describe(info):
+    keys = [(field, int(direction)) for field, direction in info["key"]]
+    expire = info.get("expireAfterSeconds")
+    return keys, bool(info.get("unique", False)), int(expire) if expire is not None else None
+
+
+async def reconcile_indexes(db, specs=None):
+    """
+    Create missing indexes and report drift against the declared specs.
+
+    Existing indexes are never dropped; an index whose keys or options
+    differ from its spec, or one that is not declared at all, is reported so
+    it can be fixed deliberately. An index that cannot be created (say, a
+    unique index over duplicate values) is reported as drift with the error
+    under ``failed``, and reconciliation carries on with the next one.
+    Returns a per-collection report.
+    """
+    specs = declared_indexes() if specs is None else specs
+    report = {}
+    for collection_name, collection_specs in specs.items():
+        collection = db[collection_name]
+        created, drifted, failed = [], [], {}
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.error(f"Listing indexes on {collection_name} failed: {e!r}")
+            report[collection_name] = {
+                "created": [], "drifted": [spec.name for spec in collection_specs], "undeclared": [],
+                "failed": {spec.name: repr(e) for spec in collection_specs},
+            }
+            continue
+        for spec in collection_specs:
+            info = existing.get(spec.name)
+            if info is None:
+                try:
+                    await collection.create_index(spec.keys, **spec.options())
+                except Exception as e:
+                    drifted.append(spec.name)
+                    failed[spec.name] = repr(e)
+                    continue
+                created.append(spec.name)
+            elif _describe(info) != (spec.keys, spec.unique, spec.expire_after_seconds):
+                drifted.append(spec.name)
+        declared_names = {spec.name for spec in collection_specs} | {"_id_"}
+        undeclared = sorted(set(existing) - declared_names)
+
+        report[collection_name] = {
+            "created": created, "drifted": drifted, "undeclared": undeclared, "failed": failed,
+        }
+        if created:
+            logger.info(f"Created indexes on {collection_name}: {', '.join(created)}")
+        for name, error in failed.items():
+            logger.error(f"Creating index {name} on {collection_name} failed: {error}")
+        if drifted:
+            logger.warning(f"Index drift on {collection_name}: {', '.join(drifted)} differ from their spec")
+        if undeclared:
+            logger.warning(f"Undeclared indexes on {collection_name}: {', '.join(undeclared)}")
+    return report
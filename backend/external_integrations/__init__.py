@@ -0,0 +1,11 @@
+from .huggingface import HuggingFaceClient, InferenceError
+from .resilience import CircuitBreaker, CircuitOpenError, ResilientInference, RetryBudget
+
+__all__ = [
+    "HuggingFaceClient",
+    "InferenceError",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ResilientInference",
+    "RetryBudget",
+]
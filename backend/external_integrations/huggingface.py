@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceError(Exception):
+    """Raised when the Hugging Face upstream fails or returns a non-200 status"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_generation(result):
+    """Whether a decoded body has the ``[{"generated_text": str}, ...]`` shape"""
+    return isinstance(result, list) and all(
+        isinstance(item, dict) and isinstance(item.get("generated_text"), str) for item in result
+    )
+
+
+class HuggingFaceClient:
+    """
+    Async client for the Hugging Face inference API.
+
+    One pooled aiohttp session is shared for the lifetime of the app and
+    concurrent upstream calls are bounded by a semaphore, so slow inference
+    calls never block the event loop or starve other endpoints.
+    """
+
+    def __init__(self, model_url, connect_timeout=5.0, read_timeout=30.0,
+                 max_concurrency=16, pool_size=32):
+        self.model_url = model_url
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=connect_timeout,
+            sock_read=read_timeout,
+        )
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self._session = None
+        self._semaphore = None
+
+    async def start(self):
+        """Create the shared session; must be called from the running loop"""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def started(self):
+        return self._session is not None and not self._session.closed
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def generate(self, payload, api_key):
+        """
+        POST a generation payload and return the decoded JSON body.
+
+        The body must be the usual ``[{"generated_text": ...}]`` list (empty
+        is allowed); anything else, including a body that is not JSON, is
+        an InferenceError like any other upstream failure.
+        """
+        if self._session is None or self._session.closed:
+            await self.start()
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+        async with self._semaphore:
+            try:
+                async with self._session.post(self.model_url, headers=headers, json=payload) as response:
+                    if response.status != 200:
+                        raise InferenceError(
+                            f"Hugging Face returned status {response.status}",
+                            status=response.status,
+                        )
+                    result = await response.json(content_type=None)
+            except asyncio.TimeoutError as e:
+                raise InferenceError("Hugging Face request timed out") from e
+            except aiohttp.ClientError as e:
+                raise InferenceError(f"Hugging Face request failed: {e}") from e
+            except ValueError as e:
+                raise InferenceError(f"Malformed Hugging Face response: {e!r}") from e
+        if not _is_generation(result):
+            raise InferenceError(f"Malformed Hugging Face response: {str(result)[:200]}")
+        return result
+
+    async def generate_stream(self, payload, api_key):
+        """
+        Stream a generation, yielding text chunks as the upstream produces them.
+
+        Sends ``"stream": true`` and reads the text-generation-inference
+        SSE format (``data: {"token": {"text": ...}}`` lines). An upstream
+        that answers with a plain JSON body instead yields its whole
+        ``generated_text`` as a single chunk.
+        """
+        if self._session is None or self._session.closed:
+            await self.start()
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+
+        async with self._semaphore:
+            try:
+                async with self._session.post(
+                    self.model_url, headers=headers, json={**payload, "stream": True}
+                ) as response:
+                    if response.status != 200:
+                        raise InferenceError(
+                            f"Hugging Face returned status {response.status}",
+                            status=response.status,
+                        )
+                    if not response.content_type.startswith("text/event-stream"):
+                        result = await response.json(content_type=None)
+                        if result:
+                            yield result[0]["generated_text"]
+                        return
+                    async for line in response.content:
+                        if not line.startswith(b"data:"):
+                            continue
+                        event = json.loads(line[5:])
+                        token = event.get("token") or {}
+                        if token.get("text") and not token.get("special"):
+                            yield token["text"]
+            except asyncio.TimeoutError as e:
+                raise InferenceError("Hugging Face request timed out") from e
+            except aiohttp.ClientError as e:
+                raise InferenceError(f"Hugging Face request failed: {e}") from e
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                raise InferenceError(f"Malformed Hugging Face stream: {e!r}") from e
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from .huggingface import InferenceError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(InferenceError):
+    """Raised without calling the upstream while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a rolling window of the last ``window`` calls.
+
+    The circuit opens when at least ``min_calls`` calls are in the window
+    and either the failure rate reaches ``failure_rate`` or the share of
+    calls slower than ``slow_call_seconds`` reaches ``slow_call_rate``.
+    While open every call is rejected. After ``open_seconds`` it goes
+    half-open and lets ``half_open_calls`` probes through: success closes
+    it, any failure opens it again. A probe that ends without a verdict
+    hands its slot back through ``release``, and one that has not reported
+    within ``open_seconds`` is presumed lost and replaced.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window=20, min_calls=10, failure_rate=0.5, slow_call_seconds=5.0,
+                 slow_call_rate=0.8, open_seconds=30.0, half_open_calls=1):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = self.CLOSED
+        self.opened = 0  # number of times the circuit has tripped
+        self._calls = deque(maxlen=window)  # (failed, slow) per call
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_at = 0.0
+
+    def allow(self):
+        """Whether a call may go to the upstream now"""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.open_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                if now - self._probe_at < self.open_seconds:
+                    return False
+                # The probes never reported back; let fresh ones through
+                self._probes = 0
+            self._probes += 1
+            self._probe_at = now
+        return True
+
+    def release(self):
+        """Give back the slot of a call that ended without an outcome"""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record(self, success, duration):
+        slow = duration >= self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            if success and not slow:
+                self.state = self.CLOSED
+                self._calls.clear()
+                logger.info("Upstream circuit closed")
+            else:
+                self._trip()
+            return
+
+        self._calls.append((not success, slow))
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._calls) / len(self._calls)
+        slow_calls = sum(slow for _, slow in self._calls) / len(self._calls)
+        if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+            self._trip()
+
+    def _trip(self):
+        if self.state != self.OPEN:
+            logger.warning(f"Upstream circuit opened for {self.open_seconds:g}s")
+        self.state = self.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+
+
+class RetryBudget:
+    """
+    Token bucket that caps retries and hedges to a fraction of traffic.
+
+    Every first attempt deposits ``ratio`` tokens (up to ``max_tokens``) and
+    every extra attempt spends one, so a failing upstream sees at most
+    about ``1 + ratio`` times the original load rather than a retry storm.
+    """
+
+    def __init__(self, ratio=0.1, max_tokens=10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class ResilientInference:
+    """
+    Wraps HuggingFaceClient.generate with a breaker, hedging and retries.
+
+    Each call is bounded by ``deadline`` seconds. If the first attempt has
+    not answered after ``hedge_after`` seconds a second, hedged attempt is
+    started and the first answer wins; a failed attempt is retried up to
+    ``max_retries`` times. Hedges and retries draw on ``budget``. Every
+    failure surfaces as InferenceError, so callers keep their fallback path.
+    """
+
+    def __init__(self, client, breaker, budget, deadline=10.0, hedge_after=None, max_retries=1):
+        self.client = client
+        self.breaker = breaker
+        self.budget = budget
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.max_retries = max_retries
+        self.hedges = 0
+        self.retries = 0
+
+    async def generate(self, payload, api_key):
+        if not self.breaker.allow():
+            raise CircuitOpenError("Upstream circuit is open")
+        self.budget.deposit()
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._attempts(payload, api_key), self.deadline)
+        except asyncio.TimeoutError:
+            self.breaker.record(False, time.monotonic() - started)
+            raise InferenceError(f"Hugging Face call exceeded its {self.deadline:g}s deadline")
+        except asyncio.CancelledError:
+            # The caller went away, which says nothing about the upstream
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record(False, time.monotonic() - started)
+            raise
+        self.breaker.record(True, time.monotonic() - started)
+        return result
+
+    async def generate_stream(self, payload, api_key):
+        """
+        Stream chunks through the breaker.
+
+        Streams are not hedged or retried, since chunks may already have
+        reached the caller; instead the first chunk must arrive within
+        ``deadline`` seconds. The breaker records the outcome when the stream
+        ends; a consumer that stops early, or is cancelled, records nothing
+        and only releases its breaker slot.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Upstream circuit is open")
+
+        started = time.monotonic()
+        stream = self.client.generate_stream(payload, api_key=api_key)
+        success = None
+        try:
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), self.deadline)
+            except asyncio.TimeoutError:
+                raise InferenceError(f"No Hugging Face output within {self.deadline:g}s")
+            yield chunk
+            async for chunk in stream:
+                yield chunk
+            success = True
+        except StopAsyncIteration:
+            success = True  # the upstream finished without any output
+        except Exception:
+            success = False
+            raise
+        finally:
+            if success is None:
+                self.breaker.release()
+            else:
+                self.breaker.record(success, time.monotonic() - started)
+            await stream.aclose()
+
+    async def _attempts(self, payload, api_key):
+        def attempt():
+            return asyncio.create_task(self.client.generate(payload, api_key=api_key))
+
+        pending = {attempt()}
+        hedged = self.hedge_after is None
+        retries_left = self.max_retries
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else self.hedge_after,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # The first attempt is slow: hedge once, if the budget allows
+                    hedged = True
+                    if self.budget.withdraw():
+                        self.hedges += 1
+                        pending.add(attempt())
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending and retries_left > 0 and self.budget.withdraw():
+                    retries_left -= 1
+                    self.retries += 1
+                    pending.add(attempt())
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
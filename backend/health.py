@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """
+    Readiness checks with cached results.
+
+    ``checks`` maps a name to an async callable that raises (or returns
+    False) when the dependency is unhealthy. Results are reused for ``ttl``
+    seconds and concurrent probes share one in-flight evaluation, so a
+    tight probe interval never turns into a stream of Mongo round trips.
+    """
+
+    def __init__(self, checks, ttl=5.0, timeout=2.0):
+        self.checks = dict(checks)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _run_check(self, name, check):
+        started = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(check(), self.timeout)
+            error = None if ok is not False else "check failed"
+        except Exception as e:
+            ok, error = False, repr(e)
+        result = {"ok": ok is not False, "latency_ms": round(1000 * (time.perf_counter() - started), 2)}
+        if error:
+            result["error"] = error
+            logger.warning(f"Readiness check {name} failed: {error}")
+        return name, result
+
+    async def status(self):
+        """``{"ready": bool, "checks": {...}, "age_seconds": float}``"""
+        if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+            async with self._lock:
+                # Another probe may have refreshed the result while we waited
+                if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                    results = dict(await asyncio.gather(
+                        *(self._run_check(name, check) for name, check in self.checks.items())
+                    ))
+                    self._result = {"ready": all(r["ok"] for r in results.values()), "checks": results}
+                    self._checked_at = time.monotonic()
+        return {**self._result, "age_seconds": round(time.monotonic() - self._checked_at, 3)}
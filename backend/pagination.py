@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def encode_cursor(timestamp, doc_id):
+    """Opaque keyset cursor for the (timestamp, id) position of a document"""
+    raw = json.dumps([timestamp.isoformat(), doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises a 400 for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(timestamp), str(doc_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor") from e
+
+
+def keyset_after(cursor, time_field="timestamp", id_field="id"):
+    """Mongo filter for documents strictly after ``cursor`` in descending order"""
+    timestamp, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {time_field: {"$lt": timestamp}},
+        {time_field: timestamp, id_field: {"$lt": doc_id}},
+    ]}
+
+
+async def fetch_page(collection, query, limit, projection, time_field="timestamp", id_field="id"):
+    """
+    Read one newest-first page of ``collection``.
+
+    Returns ``(docs, next_cursor)``; ``next_cursor`` is None on the last page.
+    One extra document is read to detect whether another page exists.
+    """
+    docs = await collection.find(query, projection).sort(
+        [(time_field, -1), (id_field, -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last[time_field], last[id_field])
+    return docs, next_cursor
+
+
+async def aggregate_page(collection, query, limit, stages, time_field="timestamp", id_field="id"):
+    """
+    Like fetch_page, but runs ``stages`` (e.g. a ``$lookup``) on the page.
+
+    Matching, sorting and limiting happen first, so the extra stages only
+    ever see ``limit + 1`` documents however large the collection is. The
+    stages must keep ``time_field`` and ``id_field`` for the cursor.
+    """
+    pipeline = [
+        {"$match": query},
+        {"$sort": {time_field: -1, id_field: -1}},
+        {"$limit": limit + 1},
+        *stages,
+    ]
+    docs = await collection.aggregate(pipeline).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last[time_field], last[id_field])
+    return docs, next_cursor
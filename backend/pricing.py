@@ -0,0 +1,212 @@
+import hashlib
+import json
+from datetime import datetime
+from itertools import product
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+
+class RateTable(NamedTuple):
+    """One versioned set of premium pricing inputs"""
+    version: str
+    base_rate: float
+    wallet: Dict[str, float]
+    coverage: Dict[str, float]
+    security: Dict[str, float]
+    duration: Dict[str, float]
+    high_risk_above: float = 1.5
+    medium_risk_above: float = 1.0
+
+
+# Same multipliers as calculatePremium in frontend/src/App.js
+RATE_TABLES = {
+    "2025-06": RateTable(
+        version="2025-06",
+        base_rate=0.025,
+        wallet={
+            "hardware": 0.5,
+            "software": 1.0,
+            "exchange": 1.8,
+        },
+        coverage={
+            "scam": 0.8,
+            "hacking": 1.0,
+            "smart-contract": 1.2,
+            "full": 1.5,
+        },
+        security={
+            "2fa-cold": 0.6,
+            "2fa-only": 0.8,
+            "cold-only": 0.7,
+            "no-security": 1.5,
+        },
+        duration={
+            "1month": 1.0,
+            "3months": 2.8,
+            "6months": 5.4,
+            "1year": 10.0,
+        },
+    ),
+}
+CURRENT_RATE_TABLE_VERSION = "2025-06"
+
+
+def get_rate_table(version=None):
+    """Look up a rate table by version; raises ValueError for unknown versions"""
+    version = version or CURRENT_RATE_TABLE_VERSION
+    try:
+        return RATE_TABLES[version]
+    except KeyError:
+        raise ValueError(f"Unknown rate table version: {version}")
+
+
+class RateMatrix(NamedTuple):
+    """
+    Every pricing combination of one rate table, precomputed.
+
+    ``unit_premiums[w, c, s, d]`` is the premium for one unit of wallet value,
+    so a quote is ``wallet_value * unit_premiums[...]``. ``body`` is the
+    pre-encoded JSON served by GET /api/quote/matrix.
+    """
+    table: RateTable
+    index: Dict[str, Dict[str, int]]
+    risk_multipliers: np.ndarray  # (wallet, coverage, security)
+    risk_levels: np.ndarray  # (wallet, coverage, security)
+    unit_premiums: np.ndarray  # (wallet, coverage, security, duration)
+    body: bytes
+    etag: str
+    built_at: datetime
+
+
+AXES = (
+    ("wallet", "wallet_type"),
+    ("coverage", "coverage_type"),
+    ("security", "security_measures"),
+    ("duration", "duration"),
+)
+
+
+def _risk_levels(table, risk_multipliers):
+    return np.select(
+        [risk_multipliers > table.high_risk_above, risk_multipliers > table.medium_risk_above],
+        ["High", "Medium"],
+        default="Low",
+    )
+
+
+def build_rate_matrix(table):
+    """Precompute risk multiplier, risk level and unit premium for every combination"""
+    wallet = np.array(list(table.wallet.values()))
+    coverage = np.array(list(table.coverage.values()))
+    security = np.array(list(table.security.values()))
+    duration = np.array(list(table.duration.values()))
+
+    risk_multipliers = wallet[:, None, None] * coverage[None, :, None] * security[None, None, :]
+    risk_levels = _risk_levels(table, risk_multipliers)
+    unit_premiums = risk_multipliers[..., None] * duration * table.base_rate / 12
+
+    entries = []
+    for (w, wallet_type), (c, coverage_type), (s, security_measures), (d, duration_label) in product(
+        enumerate(table.wallet), enumerate(table.coverage), enumerate(table.security), enumerate(table.duration)
+    ):
+        entries.append({
+            "wallet_type": wallet_type,
+            "coverage_type": coverage_type,
+            "security_measures": security_measures,
+            "duration": duration_label,
+            "risk_multiplier": float(risk_multipliers[w, c, s]),
+            "risk_level": str(risk_levels[w, c, s]),
+            "unit_premium": float(unit_premiums[w, c, s, d]),
+        })
+    payload = {
+        "rate_table_version": table.version,
+        "base_rate": table.base_rate,
+        "axes": {field: list(getattr(table, name)) for name, field in AXES},
+        "entries": entries,
+    }
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    return RateMatrix(
+        table=table,
+        index={name: {label: i for i, label in enumerate(getattr(table, name))} for name, _ in AXES},
+        risk_multipliers=risk_multipliers,
+        risk_levels=risk_levels,
+        unit_premiums=unit_premiums,
+        body=body,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        built_at=datetime.utcnow(),
+    )
+
+
+_RATE_MATRICES = {}
+
+
+def load_rate_table(table):
+    """Register a rate table version and precompute its matrix"""
+    RATE_TABLES[table.version] = table
+    _RATE_MATRICES[table.version] = build_rate_matrix(table)
+
+
+def get_rate_matrix(table):
+    """Precomputed matrix for ``table``; only rebuilt when the table changes"""
+    matrix = _RATE_MATRICES.get(table.version)
+    if matrix is None or matrix.table is not table:
+        matrix = build_rate_matrix(table)
+        _RATE_MATRICES[table.version] = matrix
+    return matrix
+
+
+for _table in list(RATE_TABLES.values()):
+    load_rate_table(_table)
+
+
+def _axis_index(matrix, axis, value, field):
+    try:
+        return matrix.index[axis][value]
+    except KeyError:
+        raise ValueError(f"Invalid {field}: {value!r} (expected one of {', '.join(matrix.index[axis])})")
+
+
+def quote_premium(table, wallet_value, wallet_type, coverage_type, security_measures, duration):
+    """Price one policy; mirrors calculatePremium on the frontend"""
+    matrix = get_rate_matrix(table)
+    w = _axis_index(matrix, "wallet", wallet_type, "wallet_type")
+    c = _axis_index(matrix, "coverage", coverage_type, "coverage_type")
+    s = _axis_index(matrix, "security", security_measures, "security_measures")
+    d = _axis_index(matrix, "duration", duration, "duration")
+    return {
+        "premium": wallet_value * float(matrix.unit_premiums[w, c, s, d]),
+        "risk_level": str(matrix.risk_levels[w, c, s]),
+        "risk_multiplier": float(matrix.risk_multipliers[w, c, s]),
+    }
+
+
+def _vector_index(matrix, axis, values, field):
+    """Map an array of category labels to matrix indices without a per-row loop"""
+    mapping = matrix.index[axis]
+    labels, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    unknown = [str(label) for label in labels if label not in mapping]
+    if unknown:
+        raise ValueError(f"Invalid {field}: {unknown[0]!r} (expected one of {', '.join(mapping)})")
+    return np.array([mapping[label] for label in labels], dtype=np.intp)[inverse]
+
+
+def quote_premiums(table, wallet_values, wallet_types, coverage_types, security_measures, durations):
+    """
+    Price many policies in one vectorized pass.
+
+    All arguments are equal-length sequences. Returns NumPy arrays of
+    premiums and risk multipliers plus an array of risk level labels.
+    """
+    matrix = get_rate_matrix(table)
+    wallet_values = np.asarray(wallet_values, dtype=np.float64)
+    w = _vector_index(matrix, "wallet", wallet_types, "wallet_type")
+    c = _vector_index(matrix, "coverage", coverage_types, "coverage_type")
+    s = _vector_index(matrix, "security", security_measures, "security_measures")
+    d = _vector_index(matrix, "duration", durations, "duration")
+    return {
+        "premiums": wallet_values * matrix.unit_premiums[w, c, s, d],
+        "risk_multipliers": matrix.risk_multipliers[w, c, s],
+        "risk_levels": matrix.risk_levels[w, c, s],
+    }
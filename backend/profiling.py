@@ -0,0 +1,145 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _frame_label(code):
+    name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    # ';' separates frames in the collapsed-stack format
+    return name.replace(";", ":")
+
+
+class StackSampler:
+    """
+    Statistical profiler for the event loop thread.
+
+    While at least one profiled request is in flight, a daemon thread
+    snapshots the loop thread's stack every ``interval`` seconds and counts
+    it under the route of every profiled request in flight. The loop runs
+    one task at a time, so with concurrent requests samples are attributed
+    approximately. Results are kept as collapsed stacks ("a;b;c count")
+    that flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, interval=0.005, max_stacks_per_route=5000, max_depth=128):
+        self.interval = interval
+        self.max_stacks_per_route = max_stacks_per_route
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._active = {}  # token -> scope of a profiled request
+        self._stacks = {}  # route -> Counter of collapsed stacks
+        self._requests = Counter()  # route -> profiled request count
+        self._thread = None
+        self._target_thread_id = None
+
+    def begin(self, scope):
+        token = object()
+        with self._lock:
+            self._target_thread_id = threading.get_ident()
+            self._active[token] = scope
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return token
+
+    def end(self, token):
+        with self._lock:
+            scope = self._active.pop(token, None)
+            if scope is not None:
+                self._requests[self._route(scope)] += 1
+
+    @property
+    def active(self):
+        return len(self._active)
+
+    @staticmethod
+    def _route(scope):
+        endpoint = scope.get("endpoint")
+        return getattr(endpoint, "__name__", "unmatched")
+
+    def _collapsed_stack(self, frame):
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                frame = sys._current_frames().get(self._target_thread_id)
+                if frame is None:
+                    continue
+                stack = self._collapsed_stack(frame)
+                for scope in self._active.values():
+                    route = self._route(scope)
+                    stacks = self._stacks.setdefault(route, Counter())
+                    if stack in stacks or len(stacks) < self.max_stacks_per_route:
+                        stacks[stack] += 1
+                    else:
+                        stacks["[truncated]"] += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                route: {"requests": self._requests[route], "samples": sum(stacks.values())}
+                for route, stacks in self._stacks.items()
+            }
+
+    def collapsed(self, route):
+        """Collapsed stacks for one route, or None if it was never profiled"""
+        with self._lock:
+            stacks = self._stacks.get(route)
+            if stacks is None:
+                return None
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that profiles a sample of requests.
+
+    A request is profiled with probability ``sample_rate`` or when it
+    carries ``X-Profile: <admin_token>``. At most ``max_active`` requests
+    are profiled at once, which bounds the sampling overhead. Only install
+    it when profiling is enabled, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app, sampler, sample_rate=0.0, admin_token=None, max_active=4):
+        self.app = app
+        self.sampler = sampler
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode("latin-1") if admin_token else None
+        self.max_active = max_active
+
+    def _wants_profile(self, scope):
+        if self.admin_token is not None:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-profile" and hmac.compare_digest(value, self.admin_token):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or self.sampler.active >= self.max_active
+                or not self._wants_profile(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        token = self.sampler.begin(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.end(token)
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import NamedTuple, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from alert_index import AlertIndex
+
+logger = logging.getLogger(__name__)
+
+
+def build_index(alerts):
+    """AlertIndex over ``alerts`` with its range-max tables built; safe to run in a thread"""
+    return AlertIndex(alerts).warm()
+
+
+class FeedSnapshot(NamedTuple):
+    """One immutable, pre-encoded version of the scam alert feed"""
+    body: bytes
+    alerts: Tuple
+    missing_sources: Tuple[str, ...]
+    built_at: datetime
+    etag: str
+    last_modified: datetime
+    index: AlertIndex  # every gathered alert, not just the top-N feed
+
+
+def encode_alerts(alerts):
+    """Serialize alerts exactly as FastAPI would for a List[ScamAlert] response"""
+    return json.dumps(jsonable_encoder(alerts), separators=(",", ":")).encode("utf-8")
+
+
+def alert_identity(alert):
+    """Fields that identify an alert; excludes the volatile relative timestamp"""
+    return (alert.source, alert.title, alert.amount_lost, alert.severity, alert.link)
+
+
+def feed_etag(alerts):
+    """Quoted content-hash ETag built from stable alert identities"""
+    digest = hashlib.sha256()
+    for alert in alerts:
+        digest.update("\x1f".join(alert_identity(alert)).encode("utf-8"))
+        digest.update(b"\x1e")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+class ScamAlertFeed:
+    """
+    Materializes the sorted top-N scam alert feed in the background.
+
+    ``gather`` is an async callable returning ``(alerts, missing_sources)``
+    and ``fallback`` returns static alerts for when every source is missing.
+    With an AlertStore as ``store``, gathered alerts are ingested into it and
+    the feed is built from the stored alerts.
+    Each refresh builds a new FeedSnapshot and swaps it in with a single
+    assignment, so readers never see a half-built feed and serving a request
+    is just a memory read. Callables in ``listeners`` are invoked with every
+    new snapshot. While ``external`` is set, snapshots only arrive through
+    ``load`` and ``current`` waits up to ``load_timeout`` seconds for the
+    first one instead of gathering alerts itself.
+    """
+
+    def __init__(self, gather, fallback, source_count, limit=20, refresh_interval=60.0, store=None,
+                 load_timeout=5.0):
+        self.gather = gather
+        self.fallback = fallback
+        self.store = store
+        self.source_count = source_count
+        self.limit = limit
+        self.refresh_interval = refresh_interval
+        self.load_timeout = load_timeout
+        self.external = False
+        self.listeners = []
+        self._snapshot = None
+        self._task = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def refresh(self):
+        """Rebuild the feed and atomically publish it"""
+        async with self._refresh_lock:
+            alerts, missing_sources = await self.gather()
+            if self.store is not None:
+                try:
+                    await self.store.ingest(alerts)
+                    alerts = self.store.alerts()
+                except Exception as e:
+                    # Serve what the sources returned until the store is reachable
+                    logger.error(f"Scam alert store unavailable: {e!r}")
+            if not alerts and len(missing_sources) >= self.source_count:
+                alerts = self.fallback()
+            # Indexing thousands of alerts takes tens of milliseconds; keep
+            # it, and the range-max tables, off the event loop
+            index = await asyncio.to_thread(build_index, alerts)
+            return self._publish(index, missing_sources)
+
+    def _publish(self, index, missing_sources, built_at=None, last_modified=None):
+        alerts = index.recent(self.limit)
+        built_at = built_at or datetime.utcnow()
+        etag = feed_etag(alerts)
+        previous = self._snapshot
+        if last_modified is None:
+            # Last-Modified only moves when the set of alerts actually changes
+            if previous is not None and previous.etag == etag:
+                last_modified = previous.last_modified
+            else:
+                last_modified = built_at
+        snapshot = FeedSnapshot(
+            body=encode_alerts(alerts),
+            alerts=tuple(alerts),
+            missing_sources=tuple(missing_sources),
+            built_at=built_at,
+            etag=etag,
+            last_modified=last_modified,
+            index=index,
+        )
+        self._snapshot = snapshot
+        logger.info(f"Scam alert feed refreshed with {len(alerts)} alerts")
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Scam alert feed listener failed: {e!r}")
+        return snapshot
+
+    def load(self, alerts, missing_sources, built_at, last_modified, index=None):
+        """
+        Publish a feed built elsewhere, e.g. by the producer worker.
+
+        Skips gathering and the store entirely; listeners still run. Pass an
+        ``index`` from build_index to avoid indexing on the caller's thread.
+        """
+        if index is None:
+            index = build_index(alerts)
+        return self._publish(index, missing_sources, built_at, last_modified)
+
+    @property
+    def ready(self):
+        """True once the first snapshot has been built"""
+        return self._snapshot is not None
+
+    async def current(self):
+        """Return the latest snapshot, building (or awaiting) the first one on demand"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            if self.external:
+                return await asyncio.wait_for(self._first_load(), self.load_timeout)
+            snapshot = await self.refresh()
+        return snapshot
+
+    async def _first_load(self):
+        while self._snapshot is None and self.external:
+            await asyncio.sleep(0.05)
+        if self._snapshot is None:
+            # Became the producer while waiting
+            return await self.refresh()
+        return self._snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the previous snapshot until a refresh succeeds
+                logger.error(f"Scam alert feed refresh failed: {e!r}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,31 +1,174 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Header, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+from contextlib import AsyncExitStack, asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 import uuid
-from datetime import datetime
-import requests
-import aiohttp
+import json
 import asyncio
 from datetime import datetime, timedelta
-import random
+import time
+import hmac
 
+from logging_setup import RequestIdMiddleware, configure_logging
+from metrics import MetricsMiddleware, MetricsRegistry, MongoCommandMetrics
+from external_integrations import (
+    CircuitBreaker, CircuitOpenError, HuggingFaceClient, InferenceError, ResilientInference, RetryBudget,
+)
+from chat_cache import ChatResponseCache, normalize_prompt
+from scam_feed import ScamAlertFeed, build_index, encode_alerts, feed_etag
+from http_cache import conditional_response
+from alert_stream import AlertBroadcaster, format_event
+from alert_index import AlertIndex, parse_amount_usd
+from alert_store import AlertStore
+from pagination import aggregate_page, fetch_page, keyset_after
+from db_indexes import reconcile_indexes
+from write_buffer import WriteBehindBuffer
+from health import HealthChecker
+from shared_state import SharedStateFile
+from single_flight import SingleFlight
+
+# Nothing below opens a connection, starts a thread or imports an optional
+# subsystem: clients are created in the app lifespan (see create_app) and
+# pricing, simulation and profiling are imported on first use.
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+logger = logging.getLogger(__name__)
+
+# In-process metrics, served at /api/metrics
+metrics = MetricsRegistry()
+http_request_latency = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method"))
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status code", ("route", "method", "status"))
+mongo_command_latency = metrics.histogram(
+    "mongo_command_duration_seconds", "Mongo command latency by collection", ("collection", "command"))
+mongo_command_failures = metrics.counter(
+    "mongo_command_failures_total", "Failed Mongo commands by collection", ("collection", "command"))
+upstream_latency = metrics.histogram(
+    "upstream_inference_duration_seconds", "Hugging Face inference latency", ("outcome",))
+upstream_requests = metrics.counter(
+    "upstream_inference_requests_total", "Hugging Face inference calls by outcome", ("outcome",))
+upstream_first_token_latency = metrics.histogram(
+    "upstream_inference_first_token_seconds", "Time to the first streamed Hugging Face chunk")
+metrics.gauge("cache_hit_ratio", "Hit ratio per cache", ("cache",),
+              lambda: [(("chat",), chat_cache.stats()["hit_ratio"])])
+metrics.gauge("cache_lookups", "Cache lookups per cache and result", ("cache", "result"),
+              lambda: [(("chat", "hit"), chat_cache.hits), (("chat", "miss"), chat_cache.misses)])
+metrics.gauge("upstream_circuit_open", "1 while the inference circuit breaker rejects calls", (),
+              lambda: [((), int(upstream_breaker.state == CircuitBreaker.OPEN))])
+metrics.gauge("upstream_circuit_trips", "Times the inference circuit breaker has opened", (),
+              lambda: [((), upstream_breaker.opened)])
+metrics.gauge("upstream_extra_attempts", "Hedged and retried inference attempts", ("kind",),
+              lambda: [(("hedge",), upstream.hedges), (("retry",), upstream.retries)])
+metrics.gauge("chat_upstream_calls", "Chat cache misses that led or joined an upstream call", ("role",),
+              lambda: [(("leader",), inflight_chats.leaders), (("coalesced",), inflight_chats.coalesced)])
+metrics.gauge("write_buffer_pending", "Documents queued for a write-behind flush", (),
+              lambda: [((), write_buffer.pending)])
+metrics.gauge("write_buffer_documents", "Documents flushed by the write-behind buffer by outcome", ("outcome",),
+              lambda: [(("written",), write_buffer.written), (("retried",), write_buffer.retried),
+                       (("failed",), write_buffer.failed)])
+
+# MongoDB connection, opened by connect_db() during startup
+client = None
+db = None
+log_listener = None
+# Clients and tasks live at module level, so one lifespan may run at a time
+lifespan_active = False
+
+# Hugging Face inference client (shared, pooled session; opened on startup)
+HF_MODEL_URL = os.environ.get(
+    'HF_MODEL_URL',
+    "https://api-inference.huggingface.co/models/microsoft/DialoGPT-large"
+)
+hf_client = HuggingFaceClient(
+    HF_MODEL_URL,
+    connect_timeout=float(os.environ.get('HF_CONNECT_TIMEOUT', '5')),
+    read_timeout=float(os.environ.get('HF_READ_TIMEOUT', '30')),
+    max_concurrency=int(os.environ.get('HF_MAX_CONCURRENCY', '16')),
+    pool_size=int(os.environ.get('HF_POOL_SIZE', '32')),
+)
+
+# Breaker, deadline, hedging and retry budget around every upstream call;
+# set HF_HEDGE_AFTER (seconds) to enable hedged requests
+upstream_breaker = CircuitBreaker(
+    window=int(os.environ.get('HF_BREAKER_WINDOW', '20')),
+    min_calls=int(os.environ.get('HF_BREAKER_MIN_CALLS', '10')),
+    failure_rate=float(os.environ.get('HF_BREAKER_FAILURE_RATE', '0.5')),
+    slow_call_seconds=float(os.environ.get('HF_BREAKER_SLOW_CALL_SECONDS', '5')),
+    slow_call_rate=float(os.environ.get('HF_BREAKER_SLOW_CALL_RATE', '0.8')),
+    open_seconds=float(os.environ.get('HF_BREAKER_OPEN_SECONDS', '30')),
+)
+upstream = ResilientInference(
+    hf_client,
+    upstream_breaker,
+    RetryBudget(ratio=float(os.environ.get('HF_RETRY_BUDGET_RATIO', '0.1'))),
+    deadline=float(os.environ.get('HF_CALL_DEADLINE', '10')),
+    hedge_after=float(os.environ['HF_HEDGE_AFTER']) if os.environ.get('HF_HEDGE_AFTER') else None,
+    max_retries=int(os.environ.get('HF_MAX_RETRIES', '1')),
+)
+
+# Cache of upstream chat answers keyed on the normalized question; its
+# Mongo collection (CHAT_CACHE_PERSIST=1) is attached by connect_db()
+chat_cache = ChatResponseCache(
+    max_entries=int(os.environ.get('CHAT_CACHE_MAX_ENTRIES', '1024')),
+    ttl_seconds=int(os.environ.get('CHAT_CACHE_TTL', '3600')),
+    max_bytes=int(os.environ.get('CHAT_CACHE_MAX_BYTES', str(8 * 1024 * 1024))),
+)
 
-# Create the main app without a prefix
-app = FastAPI()
+# In-flight upstream calls keyed on the normalized question, like the
+# cache, shared by concurrent identical questions
+inflight_chats = SingleFlight()
+
+# Monte Carlo portfolio simulator; it and its process pool are created on first use
+portfolio_simulator = None
+simulation_pool = None
+
+def get_portfolio_simulator():
+    global portfolio_simulator
+    if portfolio_simulator is None:
+        from simulation import MAX_POLICY_TRIALS, PortfolioSimulator
+        portfolio_simulator = PortfolioSimulator(
+            max_policy_trials=int(os.environ.get('SIMULATION_MAX_POLICY_TRIALS', MAX_POLICY_TRIALS)))
+    return portfolio_simulator
+
+def get_simulation_pool():
+    global simulation_pool
+    if simulation_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        simulation_pool = ProcessPoolExecutor(
+            max_workers=int(os.environ.get('SIMULATION_WORKERS', os.cpu_count() or 1)),
+            # spawn keeps workers independent of the server's threads and event loop
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return simulation_pool
+
+# Batched, off-the-critical-path inserts for chat_messages / ai_responses
+write_buffer = WriteBehindBuffer(
+    None,
+    max_queue=int(os.environ.get('WRITE_BUFFER_MAX_QUEUE', '10000')),
+    batch_size=int(os.environ.get('WRITE_BUFFER_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('WRITE_BUFFER_FLUSH_INTERVAL', '0.5')),
+    retry_delay=float(os.environ.get('WRITE_BUFFER_RETRY_DELAY', '0.5')),
+)
+
+# Opt-in request profiling; the sampler and middleware only exist when enabled
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN')
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_ADMIN_TOKEN)
+stack_sampler = None
+
+# Chat history carries users' messages; it is only served with this token
+CHAT_HISTORY_TOKEN = os.environ.get('CHAT_HISTORY_TOKEN')
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -53,6 +196,14 @@ class ChatResponse(BaseModel):
     response: str
     recommendations: List[str] = []
 
+class ChatExchange(BaseModel):
+    id: str
+    message: str
+    timestamp: datetime
+    response: Optional[str] = None  # None until the reply has been written
+    recommendations: List[str] = []
+    responded_at: Optional[datetime] = None
+
 class ScamAlert(BaseModel):
     title: str
     description: str
@@ -61,6 +212,63 @@ class ScamAlert(BaseModel):
     timestamp: datetime
     severity: str  # "high", "medium", "low"
     link: str = ""
+    amount_usd: Optional[float] = None  # parsed from amount_lost at ingestion
+
+    @model_validator(mode="after")
+    def parse_amount(self):
+        if self.amount_usd is None:
+            self.amount_usd = parse_amount_usd(self.amount_lost)
+        return self
+
+class QuotePolicy(BaseModel):
+    wallet_value: float = Field(..., ge=0)
+    wallet_type: str  # "hardware", "software", "exchange"
+    coverage_type: str  # "scam", "hacking", "smart-contract", "full"
+    security_measures: str  # "2fa-cold", "2fa-only", "cold-only", "no-security"
+    duration: str  # "1month", "3months", "6months", "1year"
+
+class QuoteRequest(QuotePolicy):
+    rate_table_version: Optional[str] = None
+
+class QuoteResponse(BaseModel):
+    premium: float
+    risk_level: str
+    risk_multiplier: float
+    duration: str
+    coverage_amount: float
+    rate_table_version: str
+
+class QuoteBatchRequest(BaseModel):
+    policies: List[QuotePolicy] = Field(..., max_length=10000)
+    rate_table_version: Optional[str] = None
+
+class QuoteBatchResponse(BaseModel):
+    rate_table_version: str
+    premiums: List[float]
+    risk_levels: List[str]
+    risk_multipliers: List[float]
+
+class PortfolioSimulationRequest(BaseModel):
+    policies: List[QuotePolicy] = Field(..., min_length=1, max_length=10000)
+    trials: int = Field(100000, ge=1000, le=2000000)
+    seed: int = Field(0, ge=0)
+    rate_table_version: Optional[str] = None
+
+class PortfolioSimulationResponse(BaseModel):
+    rate_table_version: str
+    seed: int
+    trials: int
+    policies: int
+    total_exposure: float
+    total_premium: float
+    expected_loss: float
+    loss_std: float
+    var_95: float
+    var_99: float
+    tvar_99: float
+    max_loss: float
+    probability_of_loss: float
+    expected_loss_ratio: Optional[float] = None
 
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
@@ -74,52 +282,301 @@ async def create_status_check(input: StatusCheckCreate):
     _ = await db.status_checks.insert_one(status_obj.dict())
     return status_obj
 
+STATUS_CHECK_PROJECTION = {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Newest-first page of status checks
+
+    Pages are keyed on (timestamp, id); pass the X-Next-Cursor header of one
+    response as ``after`` to get the next page.
+    """
+    conditions = []
+    if client_name is not None:
+        conditions.append({"client_name": client_name})
+    if since is not None or until is not None:
+        time_range = {}
+        if since is not None:
+            time_range["$gte"] = since
+        if until is not None:
+            time_range["$lt"] = until
+        conditions.append({"timestamp": time_range})
+    if after is not None:
+        conditions.append(keyset_after(after))
+    query = {"$and": conditions} if conditions else {}
+    
+    docs, next_cursor = await fetch_page(db.status_checks, query, limit, STATUS_CHECK_PROJECTION)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    # Rows are already in StatusCheck shape thanks to the projection
+    return JSONResponse(jsonable_encoder(docs), headers=headers)
+
+@api_router.post("/quote", response_model=QuoteResponse)
+async def create_quote(quote_request: QuoteRequest):
+    from pricing import get_rate_table, quote_premium
+    try:
+        table = get_rate_table(quote_request.rate_table_version)
+        quote = quote_premium(
+            table,
+            quote_request.wallet_value,
+            quote_request.wallet_type,
+            quote_request.coverage_type,
+            quote_request.security_measures,
+            quote_request.duration,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return QuoteResponse(
+        **quote,
+        duration=quote_request.duration,
+        coverage_amount=quote_request.wallet_value,
+        rate_table_version=table.version,
+    )
+
+@api_router.post("/quote/batch", response_model=QuoteBatchResponse)
+async def create_quote_batch(batch: QuoteBatchRequest):
+    """
+    Price up to 10,000 policies in one vectorized NumPy pass
+
+    Results are returned column-wise, in the same order as ``policies``.
+    """
+    from pricing import get_rate_table, quote_premiums
+    policies = batch.policies
+    try:
+        table = get_rate_table(batch.rate_table_version)
+        quotes = quote_premiums(
+            table,
+            [p.wallet_value for p in policies],
+            [p.wallet_type for p in policies],
+            [p.coverage_type for p in policies],
+            [p.security_measures for p in policies],
+            [p.duration for p in policies],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return QuoteBatchResponse(
+        rate_table_version=table.version,
+        premiums=quotes["premiums"].tolist(),
+        risk_levels=quotes["risk_levels"].tolist(),
+        risk_multipliers=quotes["risk_multipliers"].tolist(),
+    )
+
+@api_router.get("/quote/matrix")
+async def get_quote_matrix(request: Request, rate_table_version: Optional[str] = None):
+    """
+    Full precomputed pricing surface for one rate table version
+
+    Each entry carries the risk multiplier, risk level and premium per unit
+    of wallet value, so a client quote is one multiplication.
+    """
+    from pricing import get_rate_matrix, get_rate_table
+    try:
+        matrix = get_rate_matrix(get_rate_table(rate_table_version))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return conditional_response(
+        request, matrix.body, matrix.etag, matrix.built_at,
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
+
+async def cancel_on_disconnect(request, coro, poll_seconds=0.5):
+    """Await ``coro``, cancelling it if the client goes away in the meantime"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected from {request.url.path}; cancelling its work")
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        task.cancel()
+
+@api_router.post("/simulate/portfolio", response_model=PortfolioSimulationResponse)
+async def simulate_portfolio(simulation: PortfolioSimulationRequest, request: Request):
+    """
+    Monte Carlo estimate of aggregate loss for a portfolio of policies
+
+    Trials are sharded across a process pool; the same seed always gives
+    the same figures. trials * policies is capped by
+    SIMULATION_MAX_POLICY_TRIALS, and queued shards are dropped if the
+    client disconnects before the result is ready.
+    """
+    from pricing import get_rate_table
+    try:
+        table = get_rate_table(simulation.rate_table_version)
+        result = await cancel_on_disconnect(request, get_portfolio_simulator().run_async(
+            table,
+            [policy.dict() for policy in simulation.policies],
+            simulation.trials,
+            seed=simulation.seed,
+            executor=get_simulation_pool(),
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return PortfolioSimulationResponse(**result, rate_table_version=table.version, seed=simulation.seed)
+
+@api_router.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def require_profile_admin(admin_token: Optional[str]):
+    if not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling admin endpoints are disabled")
+    if not admin_token or not hmac.compare_digest(admin_token, PROFILE_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@api_router.get("/admin/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(default=None)):
+    require_profile_admin(x_admin_token)
+    return {"enabled": PROFILING_ENABLED, "sample_rate": PROFILE_SAMPLE_RATE,
+            "routes": stack_sampler.summary()}
+
+@api_router.get("/admin/profiles/{route}")
+async def download_profile(route: str, x_admin_token: Optional[str] = Header(default=None)):
+    """Collapsed stacks for one route, ready for flamegraph.pl or speedscope"""
+    require_profile_admin(x_admin_token)
+    collapsed = stack_sampler.collapsed(route)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail=f"No profile recorded for route {route!r}")
+    return PlainTextResponse(collapsed, headers={
+        "Content-Disposition": f'attachment; filename="{route}.collapsed"',
+    })
+
+@api_router.delete("/admin/profiles")
+async def reset_profiles(x_admin_token: Optional[str] = Header(default=None)):
+    require_profile_admin(x_admin_token)
+    stack_sampler.reset()
+    return {"reset": True}
+
+# Joins each message of a history page to its reply and keeps only the
+# fields of a ChatExchange, so full documents never leave Mongo
+CHAT_HISTORY_STAGES = [
+    {"$lookup": {"from": "ai_responses", "localField": "id", "foreignField": "user_id", "as": "replies"}},
+    {"$project": {"_id": 0, "id": 1, "message": 1, "timestamp": 1,
+                  "reply": {"$arrayElemAt": ["$replies", 0]}}},
+    {"$project": {"id": 1, "message": 1, "timestamp": 1, "response": "$reply.response",
+                  "recommendations": {"$ifNull": ["$reply.recommendations", []]},
+                  "responded_at": "$reply.timestamp"}},
+]
+
+@api_router.get("/chat/history", response_model=List[ChatExchange])
+async def get_chat_history(
+    email: str = Query(..., min_length=3, max_length=254),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
+    x_history_token: Optional[str] = Header(default=None),
+):
+    """
+    Newest-first page of one user's chat exchanges
+
+    One aggregation: the (user_info.email, timestamp, id) index serves the
+    match, sort and limit, and only that page is joined to ai_responses via
+    its user_id index. Pass the X-Next-Cursor header as ``after`` for older
+    exchanges. Requires the CHAT_HISTORY_TOKEN in X-History-Token.
+    """
+    if not CHAT_HISTORY_TOKEN:
+        raise HTTPException(status_code=404, detail="Chat history is disabled")
+    if not x_history_token or not hmac.compare_digest(x_history_token, CHAT_HISTORY_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid history token")
+
+    query = {"user_info.email": email}
+    if after is not None:
+        query = {"$and": [query, keyset_after(after)]}
+
+    docs, next_cursor = await aggregate_page(db.chat_messages, query, limit, CHAT_HISTORY_STAGES)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    # Rows are already in ChatExchange shape thanks to the projection
+    return JSONResponse(jsonable_encoder(docs), headers=headers)
+
+@api_router.get("/chat/cache-stats")
+async def get_chat_cache_stats():
+    return chat_cache.stats()
 
 @api_router.get("/scam-alerts", response_model=List[ScamAlert])
-async def get_recent_scam_alerts():
+async def get_recent_scam_alerts(
+    request: Request,
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
     """
     Get recent crypto scams and hacks from multiple sources
+
+    The unfiltered feed is materialized in the background by scam_feed and
+    served as pre-encoded JSON, so a request is just a memory read. Filtered
+    queries are answered from the feed's time-ordered AlertIndex. Pollers
+    that send If-None-Match / If-Modified-Since get a 304 when nothing
+    changed.
     """
     try:
-        print("=== SCAM ALERTS API CALLED ===")
-        alerts = []
-        
-        # Source 1: Whale Alert API (large transactions that could be hacks)
-        whale_alerts = await fetch_whale_alerts()
-        print(f"Fetched {len(whale_alerts)} whale alerts")
-        alerts.extend(whale_alerts)
-        
-        # Source 2: DeFi hacks/exploits 
-        defi_alerts = await fetch_defi_exploits()
-        print(f"Fetched {len(defi_alerts)} defi alerts")
-        alerts.extend(defi_alerts)
-        
-        # Source 3: Recent scam patterns
-        recent_scams = await fetch_recent_scam_patterns()
-        print(f"Fetched {len(recent_scams)} recent scams")
-        alerts.extend(recent_scams)
-        
-        print(f"Total alerts before sorting: {len(alerts)}")
-        # Sort by timestamp (most recent first) and limit to 20
-        alerts.sort(key=lambda x: x.timestamp, reverse=True)
-        final_alerts = alerts[:20]
-        print(f"Returning {len(final_alerts)} alerts")
-        if final_alerts:
-            print(f"First alert title: {final_alerts[0].title}")
-            print(f"First alert link: {final_alerts[0].link}")
-        return final_alerts
-        
+        snapshot = await scam_feed.current()
     except Exception as e:
-        print(f"ERROR in scam alerts: {str(e)}")
-        print(f"Exception type: {type(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.error(f"Error building scam alert feed: {e!r}")
         # Return fallback static alerts
         return get_fallback_scam_alerts()
+    
+    headers = {}
+    if snapshot.missing_sources:
+        # Slow or failing sources are reported instead of failing the whole feed
+        headers["X-Missing-Sources"] = ",".join(snapshot.missing_sources)
+    
+    logger.debug(f"Serving scam alert feed built at {snapshot.built_at.isoformat()}")
+    filtered = any(value is not None for value in (severity, source, since, until))
+    if not filtered and limit == scam_feed.limit and offset == 0:
+        return conditional_response(request, snapshot.body, snapshot.etag, snapshot.last_modified, headers)
+    
+    alerts = snapshot.index.recent(
+        limit, offset, severity=severity, source=source, since=since, until=until
+    )
+    return conditional_response(request, encode_alerts(alerts), feed_etag(alerts), snapshot.last_modified, headers)
+
+@api_router.get("/scam-alerts/top-losses", response_model=List[ScamAlert])
+async def get_top_scam_losses(
+    limit: int = Query(10, ge=1, le=100),
+    severity: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Largest losses by USD amount
+
+    Answers queries such as "top 10 this week" (``since``) or "high severity
+    only" (``severity``) straight from the feed's AlertIndex.
+    """
+    try:
+        snapshot = await scam_feed.current()
+    except Exception as e:
+        logger.error(f"Error building scam alert feed: {e!r}")
+        # Rank the fallback static alerts instead
+        return AlertIndex(get_fallback_scam_alerts()).largest(
+            limit, severity=severity, since=since, until=until)
+    return snapshot.index.largest(limit, severity=severity, since=since, until=until)
+
+@api_router.get("/scam-alerts/stream")
+async def stream_scam_alerts(last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events feed of scam alerts
+
+    Sends the current feed as a ``snapshot`` event on connect, then one
+    ``alert`` event per newly ingested alert. Clients reconnecting with
+    Last-Event-ID only receive what they missed.
+    """
+    return StreamingResponse(
+        alert_broadcaster.stream(scam_feed.current, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @api_router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(chat_data: ChatMessage):
@@ -129,68 +586,18 @@ async def chat_with_ai(chat_data: ChatMessage):
         if not hf_api_key:
             raise HTTPException(status_code=500, detail="Hugging Face API key not configured")
         
-        # Save user info and message to database
+        # Queue user info and message for a batched database write
         user_message = {
             "id": str(uuid.uuid4()),
             "user_info": chat_data.user_info.dict(),
             "message": chat_data.message,
             "timestamp": datetime.utcnow()
         }
-        await db.chat_messages.insert_one(user_message)
-        
-        # Prepare the context for premium reduction advice
-        context = f"""You are a crypto insurance AI advisor helping users reduce their insurance premiums. 
-        The user {chat_data.user_info.name} is asking: {chat_data.message}
-        
-        Provide helpful advice about:
-        1. Security best practices that can reduce premium costs
-        2. Risk assessment for their crypto holdings
-        3. Insurance coverage recommendations
-        4. Specific actionable steps to lower their risk profile
-        
-        Keep responses concise and actionable. Focus on premium reduction strategies."""
-        
-        # Call Hugging Face API
-        headers = {
-            "Authorization": f"Bearer {hf_api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "inputs": context,
-            "parameters": {
-                "max_new_tokens": 200,
-                "temperature": 0.7,
-                "return_full_text": False
-            }
-        }
-        
-        # Using a good conversational model
-        hf_url = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-large"
+        await write_buffer.put("chat_messages", user_message)
         
-        response = requests.post(hf_url, headers=headers, json=payload)
+        ai_response, recommendations = await generate_ai_reply(chat_data, hf_api_key)
         
-        if response.status_code != 200:
-            # Fallback response if HF API fails
-            ai_response = f"Hello {chat_data.user_info.name}! I'm here to help you reduce your crypto insurance premiums. Based on your question about '{chat_data.message}', I recommend focusing on improving your security setup. Would you like specific advice on hardware wallets, 2FA setup, or DeFi risk management?"
-            recommendations = [
-                "Use a hardware wallet (40% premium reduction)",
-                "Enable 2FA on all accounts (15% reduction)",
-                "Regular security audits (10% reduction)"
-            ]
-        else:
-            result = response.json()
-            ai_response = result[0]["generated_text"] if result else f"Hello {chat_data.user_info.name}! I'm here to help you lower your premium costs. What specific crypto security concerns do you have?"
-            
-            # Generate recommendations based on common premium reduction strategies
-            recommendations = [
-                "Hardware wallet usage can reduce premiums by up to 40%",
-                "Multi-factor authentication saves 15% on premiums",
-                "Cold storage practices offer additional discounts",
-                "Regular portfolio rebalancing towards stablecoins reduces risk"
-            ]
-        
-        # Save AI response to database
+        # Queue AI response for a batched database write
         ai_message = {
             "id": str(uuid.uuid4()),
             "user_id": user_message["id"],
@@ -198,7 +605,7 @@ async def chat_with_ai(chat_data: ChatMessage):
             "recommendations": recommendations,
             "timestamp": datetime.utcnow()
         }
-        await db.ai_responses.insert_one(ai_message)
+        await write_buffer.put("ai_responses", ai_message)
         
         return ChatResponse(response=ai_response, recommendations=recommendations)
         
@@ -206,6 +613,189 @@ async def chat_with_ai(chat_data: ChatMessage):
         logger.error(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
+@api_router.post("/chat/stream")
+async def chat_with_ai_stream(chat_data: ChatMessage):
+    """
+    Streaming variant of /chat: the answer arrives as Server-Sent Events
+
+    Same request body as /chat. ``token`` events carry text chunks as the
+    upstream generates them; the final ``done`` event has the same shape as
+    the /chat response.
+    """
+    hf_api_key = os.environ.get('HF_API_KEY')
+    if not hf_api_key:
+        raise HTTPException(status_code=500, detail="Hugging Face API key not configured")
+
+    user_message = {
+        "id": str(uuid.uuid4()),
+        "user_info": chat_data.user_info.dict(),
+        "message": chat_data.message,
+        "timestamp": datetime.utcnow()
+    }
+    await write_buffer.put("chat_messages", user_message)
+
+    return StreamingResponse(
+        stream_ai_reply(chat_data, hf_api_key, user_message["id"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def build_inference_payload(message: str):
+    """
+    Prompt and generation parameters for one chat message
+
+    Built from the message alone: answers are cached and shared across
+    users keyed on the message, so nothing personal may reach the prompt.
+    """
+    # Prepare the context for premium reduction advice
+    context = f"""You are a crypto insurance AI advisor helping users reduce their insurance premiums. 
+    The user is asking: {message}
+    
+    Provide helpful advice about:
+    1. Security best practices that can reduce premium costs
+    2. Risk assessment for their crypto holdings
+    3. Insurance coverage recommendations
+    4. Specific actionable steps to lower their risk profile
+    
+    Keep responses concise and actionable. Focus on premium reduction strategies."""
+    
+    return {
+        "inputs": context,
+        "parameters": {
+            "max_new_tokens": 200,
+            "temperature": 0.7,
+            "return_full_text": False
+        }
+    }
+
+# Generate recommendations based on common premium reduction strategies
+UPSTREAM_RECOMMENDATIONS = [
+    "Hardware wallet usage can reduce premiums by up to 40%",
+    "Multi-factor authentication saves 15% on premiums",
+    "Cold storage practices offer additional discounts",
+    "Regular portfolio rebalancing towards stablecoins reduces risk"
+]
+
+FALLBACK_RECOMMENDATIONS = [
+    "Use a hardware wallet (40% premium reduction)",
+    "Enable 2FA on all accounts (15% reduction)",
+    "Regular security audits (10% reduction)"
+]
+
+def fallback_reply(chat_data: ChatMessage):
+    """Canned answer used when the upstream fails or its circuit is open"""
+    ai_response = f"Hello {chat_data.user_info.name}! I'm here to help you reduce your crypto insurance premiums. Based on your question about '{chat_data.message}', I recommend focusing on improving your security setup. Would you like specific advice on hardware wallets, 2FA setup, or DeFi risk management?"
+    return ai_response, list(FALLBACK_RECOMMENDATIONS)
+
+async def call_upstream(message: str, payload: dict, hf_api_key: str):
+    """One upstream inference for a chat message's payload; None when it fails"""
+
+    # Call Hugging Face API without blocking the event loop; bounded by the
+    # upstream deadline and skipped entirely while the circuit is open
+    started = time.perf_counter()
+    try:
+        result = await upstream.generate(payload, api_key=hf_api_key)
+        outcome = "ok"
+    except CircuitOpenError:
+        # Fail fast: the upstream is known to be unhealthy
+        result = None
+        outcome = "circuit_open"
+    except InferenceError as e:
+        logger.warning(f"Hugging Face inference failed: {e}")
+        result = None
+        outcome = "error"
+    upstream_latency.observe(time.perf_counter() - started, outcome)
+    upstream_requests.inc(outcome)
+    
+    # Only genuine upstream answers are cached; fallbacks are per-user
+    if result:
+        await chat_cache.set(message, result[0]["generated_text"], list(UPSTREAM_RECOMMENDATIONS))
+    return result
+
+async def generate_ai_reply(chat_data: ChatMessage, hf_api_key: str):
+    """
+    Answer a chat message from the cache or the Hugging Face upstream
+
+    Concurrent cache misses for the same normalized question share a
+    single upstream call, like cache hits share one stored answer.
+    """
+    cached = await chat_cache.get(chat_data.message)
+    if cached is not None:
+        logger.debug("Chat cache hit")
+        return cached["response"], cached["recommendations"]
+    
+    payload = build_inference_payload(chat_data.message)
+    result = await inflight_chats.do(
+        normalize_prompt(chat_data.message),
+        lambda: call_upstream(chat_data.message, payload, hf_api_key),
+    )
+    
+    if result is None:
+        # Fallback response if HF API fails
+        ai_response, recommendations = fallback_reply(chat_data)
+    else:
+        ai_response = result[0]["generated_text"] if result else f"Hello {chat_data.user_info.name}! I'm here to help you lower your premium costs. What specific crypto security concerns do you have?"
+        recommendations = list(UPSTREAM_RECOMMENDATIONS)
+    
+    return ai_response, recommendations
+
+async def stream_ai_reply(chat_data: ChatMessage, hf_api_key: str, user_id: str):
+    """
+    Server-Sent Events for one streamed chat answer.
+
+    Emits a ``token`` event per upstream chunk and a final ``done`` event
+    with the assembled response and recommendations. Cache hits and
+    fallbacks arrive as a single token. The assembled answer is queued for
+    ai_responses only once the stream has completed.
+    """
+    event_id = 0
+
+    def event(name, data):
+        nonlocal event_id
+        event_id += 1
+        return format_event(name, event_id, json.dumps(data).encode("utf-8"))
+
+    cached = await chat_cache.get(chat_data.message)
+    if cached is not None:
+        ai_response, recommendations = cached["response"], cached["recommendations"]
+        yield event("token", {"text": ai_response})
+    else:
+        chunks = []
+        started = time.perf_counter()
+        try:
+            async for chunk in upstream.generate_stream(build_inference_payload(chat_data.message), api_key=hf_api_key):
+                if not chunks:
+                    upstream_first_token_latency.observe(time.perf_counter() - started)
+                chunks.append(chunk)
+                yield event("token", {"text": chunk})
+            outcome = "ok"
+        except CircuitOpenError:
+            outcome = "circuit_open"
+        except InferenceError as e:
+            logger.warning(f"Hugging Face streaming failed: {e}")
+            outcome = "error"
+        upstream_latency.observe(time.perf_counter() - started, outcome)
+        upstream_requests.inc(outcome)
+
+        if chunks:
+            # Keep what was already shown, even if the stream broke off
+            ai_response = "".join(chunks)
+            recommendations = list(UPSTREAM_RECOMMENDATIONS)
+            if outcome == "ok":
+                await chat_cache.set(chat_data.message, ai_response, recommendations)
+        else:
+            ai_response, recommendations = fallback_reply(chat_data)
+            yield event("token", {"text": ai_response})
+
+    await write_buffer.put("ai_responses", {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "response": ai_response,
+        "recommendations": recommendations,
+        "timestamp": datetime.utcnow()
+    })
+    yield event("done", {"response": ai_response, "recommendations": recommendations})
+
 async def fetch_whale_alerts():
     """Fetch real recent crypto incidents from reliable sources"""
     alerts = []
@@ -430,26 +1020,327 @@ def get_fallback_scam_alerts():
         )
     ]
 
+# Scam alert sources, fetched concurrently by gather_scam_alerts
+SCAM_ALERT_SOURCES = {
+    "whale_alerts": fetch_whale_alerts,
+    "defi_exploits": fetch_defi_exploits,
+    "scam_patterns": fetch_recent_scam_patterns,
+}
+SCAM_SOURCE_TIMEOUT = float(os.environ.get('SCAM_SOURCE_TIMEOUT', '3'))
+SCAM_FEED_TIMEOUT = float(os.environ.get('SCAM_FEED_TIMEOUT', '5'))
+
+async def gather_scam_alerts():
+    """
+    Fetch every alert source concurrently.
 
+    Each source gets SCAM_SOURCE_TIMEOUT seconds and the whole fan-out gets
+    SCAM_FEED_TIMEOUT seconds. Returns the alerts that arrived in time and
+    the names of the sources that timed out or failed.
+    """
+    tasks = {
+        name: asyncio.create_task(asyncio.wait_for(fetch(), SCAM_SOURCE_TIMEOUT))
+        for name, fetch in SCAM_ALERT_SOURCES.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=SCAM_FEED_TIMEOUT)
+    for task in pending:
+        task.cancel()
 
-# Include the router in the main app
-app.include_router(api_router)
+    alerts = []
+    missing_sources = []
+    for name, task in tasks.items():
+        if task in done and task.exception() is None:
+            alerts.extend(task.result())
+            continue
+        missing_sources.append(name)
+        if task in pending:
+            logger.warning(f"Scam alert source {name} missed the feed deadline")
+        else:
+            logger.warning(f"Scam alert source {name} failed: {task.exception()!r}")
+    return alerts, missing_sources
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Background-refreshed, pre-encoded top-N scam alert feed, persisted in scam_alerts
+scam_feed = ScamAlertFeed(
+    gather_scam_alerts,
+    get_fallback_scam_alerts,
+    source_count=len(SCAM_ALERT_SOURCES),
+    limit=20,
+    refresh_interval=float(os.environ.get('SCAM_FEED_REFRESH_INTERVAL', '60')),
+    # How long a follower worker waits for the producer's first snapshot
+    load_timeout=float(os.environ.get('SHARED_STATE_LOAD_TIMEOUT', '5')),
+    store=AlertStore(
+        None,  # attached by connect_db()
+        ScamAlert,
+        retention=timedelta(days=float(os.environ.get('SCAM_ALERT_RETENTION_DAYS', '30'))),
+    ),
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Push channel for /api/scam-alerts/stream, fed by every feed refresh
+alert_broadcaster = AlertBroadcaster(
+    heartbeat_interval=float(os.environ.get('SCAM_STREAM_HEARTBEAT', '15')),
 )
-logger = logging.getLogger(__name__)
+scam_feed.listeners.append(alert_broadcaster.publish_snapshot)
+
+# Multi-worker mode: with SHARED_STATE_PATH set, one worker (the producer)
+# refreshes the feed and publishes it with the rate tables to a shared
+# mmapped file; the other workers poll its version counter and load it.
+SHARED_STATE_PATH = os.environ.get('SHARED_STATE_PATH')
+SHARED_STATE_POLL_INTERVAL = float(os.environ.get('SHARED_STATE_POLL_INTERVAL', '0.5'))
+shared_state = None
+
+# Alert fields published to followers, as one row per alert; amount_usd is
+# parsed again from amount_lost when a follower loads them
+SHARED_ALERT_FIELDS = ("title", "description", "amount_lost", "source", "timestamp", "severity", "link")
+
+def encode_shared_state(snapshot, max_alerts):
+    """The newest ``max_alerts`` alerts of the snapshot plus the rate tables"""
+    from pricing import RATE_TABLES
+    alerts = snapshot.index.recent(max_alerts)
+    return json.dumps(jsonable_encoder({
+        "feed": {
+            "alerts": [[getattr(alert, field) for field in SHARED_ALERT_FIELDS] for alert in alerts],
+            "missing_sources": snapshot.missing_sources,
+            "built_at": snapshot.built_at,
+            "last_modified": snapshot.last_modified,
+        },
+        "rate_tables": {version: table._asdict() for version, table in RATE_TABLES.items()},
+    }), separators=(",", ":")).encode("utf-8")
+
+def publish_shared_state(snapshot):
+    """
+    Publish the snapshot for the followers.
+
+    If every stored alert does not fit in a slot, the oldest are left out
+    (followers' filtered queries then reach back less far) rather than not
+    publishing at all; the top-N feed itself always goes out.
+    """
+    max_alerts = len(snapshot.index)
+    payload = encode_shared_state(snapshot, max_alerts)
+    while len(payload) > shared_state.capacity and max_alerts > scam_feed.limit:
+        max_alerts = max(scam_feed.limit, int(max_alerts * shared_state.capacity / len(payload) * 0.95))
+        payload = encode_shared_state(snapshot, max_alerts)
+    if max_alerts < len(snapshot.index):
+        logger.warning(f"Shared state holds the newest {max_alerts} of {len(snapshot.index)} alerts; "
+                       f"raise SHARED_STATE_MAX_BYTES to share them all")
+    try:
+        version = shared_state.publish(payload)
+    except ValueError as e:
+        logger.error(f"Shared state not published: {e}")
+        return
+    logger.debug(f"Published shared state version {version}")
+
+def decode_shared_state(payload):
+    """Parse a shared state payload and index its alerts; safe to run in a thread"""
+    state = json.loads(payload)
+    feed = state["feed"]
+    feed["alerts"] = [ScamAlert(**dict(zip(SHARED_ALERT_FIELDS, row))) for row in feed["alerts"]]
+    feed["index"] = build_index(feed["alerts"])
+    return state
+
+def apply_shared_state(state):
+    from pricing import RATE_TABLES, RateTable, load_rate_table
+    for version, fields in state["rate_tables"].items():
+        table = RateTable(**fields)
+        if RATE_TABLES.get(version) != table:
+            load_rate_table(table)
+    feed = state["feed"]
+    scam_feed.load(
+        feed["alerts"],
+        feed["missing_sources"],
+        built_at=datetime.fromisoformat(feed["built_at"]),
+        last_modified=datetime.fromisoformat(feed["last_modified"]),
+        index=feed["index"],
+    )
+
+async def follow_shared_state():
+    """
+    Load new shared state versions until this worker becomes the producer.
+
+    Until then the feed is external: requests wait for the producer's
+    snapshot rather than gathering alerts in this worker.
+
+    The producer lock is retried on every poll, so if the producer exits
+    another worker takes over refreshing and publishing the feed.
+    """
+    seen_version = 0
+    while not shared_state.acquire_producer():
+        try:
+            if shared_state.version != seen_version:
+                seen_version, payload = shared_state.read()
+                apply_shared_state(await asyncio.to_thread(decode_shared_state, payload))
+        except Exception as e:
+            logger.error(f"Loading shared state failed: {e!r}")
+        await asyncio.sleep(SHARED_STATE_POLL_INTERVAL)
+
+    logger.info(f"Worker {os.getpid()} is now the shared state producer")
+    scam_feed.external = False
+    scam_feed.listeners.append(publish_shared_state)
+    scam_feed.start()
+
+
+# Readiness: dependencies the app cannot usefully serve without
+async def check_mongo():
+    await db.command("ping")
+
+async def check_scam_feed():
+    return scam_feed.ready
+
+async def check_hf_client():
+    return hf_client.started
+
+health_checker = HealthChecker(
+    {"mongo": check_mongo, "scam_feed": check_scam_feed, "hf_client": check_hf_client},
+    ttl=float(os.environ.get('HEALTH_CACHE_TTL', '5')),
+    timeout=float(os.environ.get('HEALTH_CHECK_TIMEOUT', '2')),
+)
+
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness: the process is up and the event loop is responsive"""
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def health_ready():
+    """Readiness: cached dependency checks; 503 until every check passes"""
+    status = await health_checker.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+def connect_db():
+    """Create the Mongo client and attach it to everything that persists"""
+    global client, db
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(
+        os.environ['MONGO_URL'],
+        event_listeners=[MongoCommandMetrics(mongo_command_latency, mongo_command_failures)]
+    )
+    db = client[os.environ['DB_NAME']]
+    if os.environ.get('CHAT_CACHE_PERSIST') == '1':
+        chat_cache.collection = db.chat_response_cache
+    write_buffer.db = db
+    scam_feed.store.collection = db.scam_alerts
+
+
+async def ensure_indexes(app):
+    try:
+        app.state.index_report = await reconcile_indexes(db)
+    except Exception as e:
+        logger.error(f"Index reconciliation failed: {e!r}")
+
+
+def close_shared_state():
+    global shared_state
+    shared_state.close()
+    shared_state = None
+
+
+def remove_listener(listeners, listener):
+    if listener in listeners:
+        listeners.remove(listener)
+
+
+def shutdown_simulation_pool():
+    if simulation_pool is not None:
+        simulation_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Open clients and background tasks on startup, release them on shutdown.
+
+    Everything here runs inside the serving process (after any fork), so
+    each worker gets its own Mongo client, HTTP session and threads. Run
+    several workers with e.g. ``SHARED_STATE_PATH=/dev/shm/bitsafe-state
+    uvicorn server:app --workers 4`` so only one of them refreshes the feed.
+    Each step registers its teardown as soon as it succeeds, so a failed
+    startup still releases whatever was already running.
+    """
+    global log_listener, shared_state, lifespan_active
+    if lifespan_active:
+        raise RuntimeError("Another app's lifespan is running; apps in one process share its clients")
+    lifespan_active = True
+    try:
+        async with AsyncExitStack() as teardown:
+            # Configure logging: JSON records written by a background thread
+            log_listener = configure_logging(
+                level=os.environ.get('LOG_LEVEL', 'INFO'),
+                fmt=os.environ.get('LOG_FORMAT', 'json'),
+                debug_sample_rate=float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0.01')),
+            )
+            # Stopped last, so records from the other shutdown steps are flushed
+            teardown.callback(log_listener.stop)
+            connect_db()
+            teardown.callback(client.close)
+            teardown.callback(shutdown_simulation_pool)
+            # Index builds run in the background so a slow Mongo never delays startup
+            app.state.index_task = asyncio.create_task(ensure_indexes(app))
+            teardown.callback(app.state.index_task.cancel)
+            write_buffer.start()
+            # Closed before the Mongo client so queued inserts reach it
+            teardown.push_async_callback(write_buffer.close)
+            await hf_client.start()
+            teardown.push_async_callback(hf_client.close)
+            if SHARED_STATE_PATH:
+                shared_state = SharedStateFile(
+                    SHARED_STATE_PATH,
+                    capacity=int(os.environ.get('SHARED_STATE_MAX_BYTES', str(4 * 1024 * 1024))),
+                )
+                shared_state.open()
+                teardown.callback(close_shared_state)
+                teardown.push_async_callback(scam_feed.stop)
+                scam_feed.external = True
+                teardown.callback(setattr, scam_feed, "external", False)
+                teardown.callback(remove_listener, scam_feed.listeners, publish_shared_state)
+                app.state.shared_state_task = asyncio.create_task(follow_shared_state())
+                teardown.callback(app.state.shared_state_task.cancel)
+            else:
+                scam_feed.start()
+                teardown.push_async_callback(scam_feed.stop)
+            yield
+    finally:
+        lifespan_active = False
+
+
+def create_app():
+    """
+    Build the ASGI app.
+
+    Cheap by design: no connections, threads or optional imports happen
+    until the lifespan starts. ``uvicorn server:app`` uses the module-level
+    instance and ``uvicorn --factory server:create_app`` works as well, but
+    every app built here shares this module's clients, caches and
+    background tasks: it is a fresh ASGI stack, not a fresh backend, and
+    only one app per process may run its lifespan at a time.
+    """
+    global stack_sampler
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(api_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Missing-Sources", "X-Next-Cursor", "X-Request-ID"],
+    )
+    if PROFILING_ENABLED:
+        from profiling import ProfilerMiddleware, StackSampler
+        if stack_sampler is None:
+            stack_sampler = StackSampler(
+                interval=float(os.environ.get('PROFILE_INTERVAL', '0.005')),
+                max_stacks_per_route=int(os.environ.get('PROFILE_MAX_STACKS', '5000')),
+            )
+        app.add_middleware(
+            ProfilerMiddleware,
+            sampler=stack_sampler,
+            sample_rate=PROFILE_SAMPLE_RATE,
+            admin_token=PROFILE_ADMIN_TOKEN,
+            max_active=int(os.environ.get('PROFILE_MAX_ACTIVE', '4')),
+        )
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(MetricsMiddleware, latency=http_request_latency, requests=http_requests)
+    return app
+
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+app = create_app()
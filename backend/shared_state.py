@@ -0,0 +1,119 @@
+import fcntl
+import logging
+import mmap
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"BSSTATE1"
+# magic, version, length of slot 0, length of slot 1
+_HEADER = struct.Struct("<8sQQQ")
+_VERSION_WORD = 1
+_LENGTH_WORD = 2  # slot 0; slot 1 follows
+
+
+class SharedStateFile:
+    """
+    Versioned blob shared between worker processes through a mmapped file.
+
+    The file holds a header and two payload slots. ``publish`` writes the
+    next version into the slot readers are not using and only then bumps
+    the version counter, so a reader that sees the same version before and
+    after copying a slot has a consistent payload (a seqlock). Checking for
+    news is a single 8-byte read of ``version``; the payload is only
+    copied out when the version changes.
+
+    One process should publish at a time: ``acquire_producer`` takes an
+    exclusive, non-blocking lock on ``<path>.lock``. The lock dies with its
+    holder, so another worker can take over if the producer exits.
+
+    The version and slot lengths are loaded and stored through an aligned
+    8-byte view of the header, so each access is one machine word and can
+    never be observed half-written (struct packs byte by byte, clearing
+    the field first).
+    """
+
+    def __init__(self, path, capacity=4 * 1024 * 1024):
+        self.path = path
+        self.capacity = capacity
+        self._mmap = None
+        self._words = None
+        self._lock_fd = None
+
+    def open(self):
+        size = _HEADER.size + 2 * self.capacity
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # Take the lock briefly so concurrent workers initialize the file once
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(_MAGIC, 0, 0, 0), 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{self.path} is not a shared state file")
+        self._words = memoryview(self._mmap)[:_HEADER.size].cast("Q")
+
+    def close(self):
+        if self._words is not None:
+            self._words.release()
+            self._words = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    @property
+    def is_producer(self):
+        return self._lock_fd is not None
+
+    def acquire_producer(self):
+        """Try to become the producer; returns True if this process is it"""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    @property
+    def version(self):
+        return self._words[_VERSION_WORD]
+
+    def _slot_offset(self, version):
+        return _HEADER.size + (version % 2) * self.capacity
+
+    def publish(self, payload):
+        """Write ``payload`` as the next version and return that version"""
+        if len(payload) > self.capacity:
+            raise ValueError(f"Payload of {len(payload)} bytes exceeds the {self.capacity} byte slot")
+        version = self.version + 1
+        offset = self._slot_offset(version)
+        self._mmap[offset:offset + len(payload)] = payload
+        self._words[_LENGTH_WORD + version % 2] = len(payload)
+        # The version goes last: it is what makes the new slot visible
+        self._words[_VERSION_WORD] = version
+        return version
+
+    def read(self):
+        """``(version, payload)`` of the latest publish; ``(0, None)`` before any"""
+        while True:
+            version = self.version
+            if version == 0:
+                return 0, None
+            length = self._words[_LENGTH_WORD + version % 2]
+            offset = self._slot_offset(version)
+            payload = self._mmap[offset:offset + length]
+            if self.version == version:
+                return version, payload
+            # The producer lapped us while copying; retry with the new version
@@ -0,0 +1,215 @@
+import asyncio
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+from pricing import quote_premiums
+
+SEVERITIES = ("high", "medium", "low")
+CATEGORIES = ("scam", "hacking", "smart-contract")
+
+# Incident categories each coverage type pays out on
+COVERED_CATEGORIES = {
+    "scam": ("scam",),
+    "hacking": ("hacking",),
+    "smart-contract": ("smart-contract",),
+    "full": CATEGORIES,
+}
+
+# Shard size is fixed so results do not depend on how many workers run them
+TRIALS_PER_SHARD = 10000
+# Upper bound on random draws held in memory at once inside a shard
+MAX_CHUNK_ELEMENTS = 2000000
+# Default cap on trials * policies per run; each policy-trial draws one
+# random number per (category, severity) event
+MAX_POLICY_TRIALS = 20000000
+
+
+class IncidentModel(NamedTuple):
+    """Loss-event assumptions for the portfolio simulator"""
+    # Annual probability of an incident per category and severity, for a
+    # software wallet with no security discount
+    probabilities: Dict[str, Dict[str, float]]
+    # Mean fraction of wallet value lost per incident severity
+    loss_fractions: Dict[str, float]
+    wallet_factors: Dict[str, float]
+    security_factors: Dict[str, float]
+    # Beta distribution concentration around the mean loss fraction
+    loss_concentration: float = 8.0
+
+
+DEFAULT_INCIDENT_MODEL = IncidentModel(
+    probabilities={
+        "scam": {"high": 0.0020, "medium": 0.0050, "low": 0.0100},
+        "hacking": {"high": 0.0015, "medium": 0.0040, "low": 0.0080},
+        "smart-contract": {"high": 0.0010, "medium": 0.0030, "low": 0.0060},
+    },
+    loss_fractions={"high": 0.9, "medium": 0.4, "low": 0.1},
+    wallet_factors={"hardware": 0.3, "software": 1.0, "exchange": 1.6},
+    security_factors={"2fa-cold": 0.4, "2fa-only": 0.7, "cold-only": 0.6, "no-security": 1.5},
+)
+
+DURATION_MONTHS = {"1month": 1, "3months": 3, "6months": 6, "1year": 12}
+
+
+def _lookup(mapping, values, field):
+    labels, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    unknown = [str(label) for label in labels if label not in mapping]
+    if unknown:
+        raise ValueError(f"Invalid {field}: {unknown[0]!r} (expected one of {', '.join(mapping)})")
+    return np.array([mapping[label] for label in labels])[inverse]
+
+
+def event_probabilities(model, wallet_types, coverage_types, security_measures, durations):
+    """
+    Per-policy probability of each (category, severity) event over the policy term.
+
+    Returns an array of shape (policies, categories * severities); events
+    outside a policy's coverage have probability zero.
+    """
+    base = np.array([[model.probabilities[c][s] for s in SEVERITIES] for c in CATEGORIES]).reshape(-1)
+    factors = (
+        _lookup(model.wallet_factors, wallet_types, "wallet_type")
+        * _lookup(model.security_factors, security_measures, "security_measures")
+    )
+    months = _lookup(DURATION_MONTHS, durations, "duration")
+    annual = np.minimum(base[None, :] * factors[:, None], 1.0)
+    term = 1.0 - (1.0 - annual) ** (months[:, None] / 12.0)
+
+    covered = np.array([
+        [category in COVERED_CATEGORIES[coverage] for category in CATEGORIES for _ in SEVERITIES]
+        for coverage in COVERED_CATEGORIES
+    ])
+    coverage_rows = _lookup({name: i for i, name in enumerate(COVERED_CATEGORIES)}, coverage_types, "coverage_type")
+    return np.where(covered[coverage_rows], term, 0.0)
+
+
+def simulate_shard(values, probabilities, loss_fractions, loss_concentration, trials, seed_sequence):
+    """
+    Run ``trials`` Monte Carlo trials for one shard; returns portfolio losses per trial.
+
+    Top-level function so it can be shipped to a ProcessPoolExecutor.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n_policies, n_events = probabilities.shape
+    severities = np.tile(np.arange(len(SEVERITIES)), len(CATEGORIES))
+    alpha = loss_fractions * loss_concentration
+    beta = (1.0 - loss_fractions) * loss_concentration
+
+    losses = np.empty(trials)
+    chunk = max(1, MAX_CHUNK_ELEMENTS // max(1, n_policies * n_events))
+    for start in range(0, trials, chunk):
+        size = min(chunk, trials - start)
+        hits = rng.random((size, n_policies, n_events)) < probabilities
+        trial_idx, policy_idx, event_idx = np.nonzero(hits)
+        event_severity = severities[event_idx]
+        fractions = rng.beta(alpha[event_severity], beta[event_severity])
+
+        policy_fraction = np.zeros((size, n_policies))
+        np.add.at(policy_fraction, (trial_idx, policy_idx), fractions)
+        # A policy can never pay out more than its insured wallet value
+        np.minimum(policy_fraction, 1.0, out=policy_fraction)
+        losses[start:start + size] = policy_fraction @ values
+    return losses
+
+
+def _shard_plan(trials, seed):
+    n_shards = max(1, -(-trials // TRIALS_PER_SHARD))
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    sizes = [TRIALS_PER_SHARD] * (n_shards - 1) + [trials - TRIALS_PER_SHARD * (n_shards - 1)]
+    return list(zip(sizes, seeds))
+
+
+def summarize_losses(losses, values, premiums):
+    total_premium = float(premiums.sum())
+    expected_loss = float(losses.mean())
+    var_95, var_99 = np.quantile(losses, [0.95, 0.99])
+    tail = losses[losses >= var_99]
+    return {
+        "trials": int(losses.size),
+        "policies": int(values.size),
+        "total_exposure": float(values.sum()),
+        "total_premium": total_premium,
+        "expected_loss": expected_loss,
+        "loss_std": float(losses.std()),
+        "var_95": float(var_95),
+        "var_99": float(var_99),
+        "tvar_99": float(tail.mean()) if tail.size else float(var_99),
+        "max_loss": float(losses.max()),
+        "probability_of_loss": float((losses > 0).mean()),
+        "expected_loss_ratio": expected_loss / total_premium if total_premium else None,
+    }
+
+
+class PortfolioSimulator:
+    """
+    Monte Carlo estimate of aggregate portfolio loss.
+
+    Trials are split into fixed-size shards, each with its own child of
+    ``SeedSequence(seed)``, so a given seed gives identical results whether
+    the shards run inline or across a ProcessPoolExecutor of any size.
+    A run may cost at most ``max_policy_trials`` trials times policies.
+    """
+
+    def __init__(self, model=DEFAULT_INCIDENT_MODEL, max_policy_trials=MAX_POLICY_TRIALS):
+        self.model = model
+        self.max_policy_trials = max_policy_trials
+
+    def check_budget(self, trials, n_policies):
+        if trials * n_policies > self.max_policy_trials:
+            raise ValueError(
+                f"{trials} trials over {n_policies} policies exceeds the budget of "
+                f"{self.max_policy_trials} policy-trials; run fewer trials or policies"
+            )
+
+    def _prepare(self, table, policies):
+        values = np.array([p["wallet_value"] for p in policies], dtype=np.float64)
+        columns = {field: [p[field] for p in policies]
+                   for field in ("wallet_type", "coverage_type", "security_measures", "duration")}
+        probabilities = event_probabilities(
+            self.model, columns["wallet_type"], columns["coverage_type"],
+            columns["security_measures"], columns["duration"],
+        )
+        premiums = quote_premiums(
+            table, values, columns["wallet_type"], columns["coverage_type"],
+            columns["security_measures"], columns["duration"],
+        )["premiums"]
+        loss_fractions = np.array([self.model.loss_fractions[s] for s in SEVERITIES])
+        return values, probabilities, premiums, loss_fractions
+
+    def run(self, table, policies, trials, seed=0, executor=None):
+        """Synchronous run; shards go to ``executor`` when one is given"""
+        self.check_budget(trials, len(policies))
+        values, probabilities, premiums, loss_fractions = self._prepare(table, policies)
+        args = [(values, probabilities, loss_fractions, self.model.loss_concentration, size, seeds)
+                for size, seeds in _shard_plan(trials, seed)]
+        if executor is None:
+            shards = [simulate_shard(*a) for a in args]
+        else:
+            shards = list(executor.map(simulate_shard, *zip(*args)))
+        return summarize_losses(np.concatenate(shards), values, premiums)
+
+    async def run_async(self, table, policies, trials, seed=0, executor=None):
+        """
+        Like ``run`` but awaits shards so the event loop stays responsive.
+
+        Cancelling the call cancels every shard still queued in the
+        executor; shards already running finish and are discarded.
+        """
+        self.check_budget(trials, len(policies))
+        loop = asyncio.get_running_loop()
+        values, probabilities, premiums, loss_fractions = self._prepare(table, policies)
+        futures = [
+            loop.run_in_executor(
+                executor, simulate_shard,
+                values, probabilities, loss_fractions, self.model.loss_concentration, size, seeds
+            )
+            for size, seeds in _shard_plan(trials, seed)
+        ]
+        try:
+            shards = await asyncio.gather(*futures)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return summarize_losses(np.concatenate(shards), values, premiums)
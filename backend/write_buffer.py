@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_DUPLICATE_KEY = 11000
+
+
+class WriteBehindBuffer:
+    """
+    Bounded write-behind queue for fire-and-forget Mongo inserts.
+
+    Request handlers ``put`` documents and return immediately; a background
+    task groups them per collection and writes them with ``insert_many``
+    once ``batch_size`` documents are queued or ``flush_interval`` seconds
+    have passed. When the queue is full ``put`` waits, which pushes back on
+    callers instead of growing memory without bound. ``close`` drains and
+    flushes everything still queued. Documents a flush could not write are
+    retried once after ``retry_delay`` seconds before they are dropped and
+    counted in ``failed``.
+    """
+
+    def __init__(self, db, max_queue=10000, batch_size=500, flush_interval=0.5, retry_delay=0.5):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+        self.written = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            if self._queue.empty():
+                # A fresh queue binds to the loop this buffer now runs on
+                self._queue = asyncio.Queue(maxsize=self._queue.maxsize)
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, collection_name, document):
+        if self._task is None or self._task.done():
+            # Not running (e.g. outside the app lifespan): write through
+            await self.db[collection_name].insert_one(document)
+            self.written += 1
+            return
+        await self._queue.put((collection_name, document))
+
+    async def _next_batch(self):
+        """Wait for one item, then collect more until size or time runs out"""
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _insert(self, collection_name, documents):
+        """insert_many; returns the documents that were not written"""
+        try:
+            await self.db[collection_name].insert_many(documents, ordered=False)
+            return []
+        except BulkWriteError as e:
+            # A duplicate key means an earlier attempt already wrote the document
+            unwritten = {error["index"] for error in e.details.get("writeErrors", [])
+                         if error.get("code") != _DUPLICATE_KEY}
+            logger.warning(f"Write-behind flush to {collection_name} failed for {len(unwritten)} documents: {e!r}")
+            return [documents[i] for i in sorted(unwritten)]
+        except Exception as e:
+            logger.warning(f"Write-behind flush to {collection_name} failed for {len(documents)} documents: {e!r}")
+            return documents
+
+    async def _flush(self, batch):
+        by_collection = defaultdict(list)
+        for collection_name, document in batch:
+            by_collection[collection_name].append(document)
+        for collection_name, documents in by_collection.items():
+            unwritten = await self._insert(collection_name, documents)
+            if unwritten:
+                self.retried += len(unwritten)
+                await asyncio.sleep(self.retry_delay)
+                unwritten = await self._insert(collection_name, unwritten)
+            self.written += len(documents) - len(unwritten)
+            if unwritten:
+                self.failed += len(unwritten)
+                logger.error(f"Dropped {len(unwritten)} documents for {collection_name} after a retry")
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def close(self):
+        """Flush everything queued so far and stop the background writer"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_STOP)
+        await self._task
+        self._task = None
@@ -0,0 +1,132 @@
+"""
+Cold-start benchmark for the backend.
+
+Each run uses a fresh interpreter, so nothing is warm except the OS file
+cache. Two things are measured:
+
+* import: ``import server`` (which builds the app via create_app), and
+  which heavy optional modules that pulled in;
+* serve: launching ``uvicorn server:app`` until /api/health/live answers,
+  and until /api/health/ready reports ready (needs a reachable Mongo;
+  reported as null when it is not ready within --ready-timeout).
+
+    python benchmarks/cold_start_benchmark.py --runs 5 --output cold_start.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+# Modules that should only load when the feature using them is first hit
+LAZY_MODULES = ["numpy", "pricing", "simulation", "profiling", "concurrent.futures.process"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import server
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, deadline, expect_status=200):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == expect_status:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return False
+
+
+def measure_serve(ready_timeout):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}/api"
+    env = {**os.environ, "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING")}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = wait_for(f"{base}/health/live", started + 30)
+        live_seconds = time.perf_counter() - started if live else None
+        ready = live and wait_for(f"{base}/health/ready", time.perf_counter() + ready_timeout)
+        ready_seconds = time.perf_counter() - started if ready else None
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"live_seconds": live_seconds, "ready_seconds": ready_seconds}
+
+
+def describe(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ready-timeout", type=float, default=10.0)
+    parser.add_argument("--skip-serve", action="store_true", help="Only measure the import")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    imports, serves = [], []
+    for run in range(args.runs):
+        imports.append(measure_import())
+        if not args.skip_serve:
+            serves.append(measure_serve(args.ready_timeout))
+        serve = serves[-1] if serves else {}
+        print(f"run {run + 1}: import {imports[-1]['seconds'] * 1000:7.1f} ms"
+              + (f"  live {serve['live_seconds'] * 1000:7.1f} ms" if serve.get("live_seconds") else "")
+              + (f"  ready {serve['ready_seconds'] * 1000:7.1f} ms" if serve.get("ready_seconds") else ""))
+
+    results = {
+        "runs": args.runs,
+        "import": describe([i["seconds"] for i in imports]),
+        "eagerly_loaded": sorted({m for i in imports for m in i["loaded"]}),
+        "live": describe([s["live_seconds"] for s in serves]),
+        "ready": describe([s["ready_seconds"] for s in serves]),
+    }
+    print(f"\n📊 import median {results['import']['median'] * 1000:.1f} ms"
+          + (f", live median {results['live']['median'] * 1000:.1f} ms" if results["live"] else "")
+          + (f", ready median {results['ready']['median'] * 1000:.1f} ms" if results["ready"] else ""))
+    if results["eagerly_loaded"]:
+        print(f"❌ Optional modules loaded at import: {', '.join(results['eagerly_loaded'])}")
+    else:
+        print("✅ No optional subsystem was imported at startup")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if results["eagerly_loaded"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
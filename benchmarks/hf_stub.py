@@ -0,0 +1,121 @@
+"""
+Local stand-in for the Hugging Face inference endpoint.
+
+Answers every POST with a canned ``generated_text`` after a configurable
+delay, and can inject slow responses and errors so the backend can be
+load-tested without touching the real upstream. Point the server at it:
+
+    python benchmarks/hf_stub.py --port 8765 --delay 0.2 --error-rate 0.05
+    HF_MODEL_URL=http://127.0.0.1:8765/models/stub HF_API_KEY=stub uvicorn server:app
+
+Requests with ``"stream": true`` get the reply word by word in the
+text-generation-inference SSE format, ``token_delay`` seconds apart.
+
+GET /stats returns call counters; PUT /config with a JSON body such as
+{"error_rate": 1.0} changes the fault injection at runtime, e.g. to
+simulate an outage and recovery.
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+REPLY = ("Use a hardware wallet for long-term holdings, enable 2FA on every exchange "
+         "account and never share your seed phrase.")
+
+
+class StubUpstream:
+    """Configurable fake inference endpoint"""
+
+    def __init__(self, delay=0.1, jitter=0.0, error_rate=0.0, slow_rate=0.0, slow_delay=5.0,
+                 token_delay=0.02, seed=None):
+        self.delay = delay
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+
+    async def handle_generate(self, request):
+        self.calls += 1
+        body = await request.json()
+        delay = self.delay + self.random.uniform(0, self.jitter)
+        if self.random.random() < self.slow_rate:
+            self.slow += 1
+            delay = self.slow_delay
+        await asyncio.sleep(delay)
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "Model is overloaded"}, status=503)
+        if not body.get("stream"):
+            return web.json_response([{"generated_text": REPLY}])
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words = REPLY.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            event = {
+                "token": {"id": i, "text": word if last else word + " ", "special": False},
+                "generated_text": REPLY if last else None,
+            }
+            await response.write(b"data:" + json.dumps(event).encode("utf-8") + b"\n\n")
+            if not last:
+                await asyncio.sleep(self.token_delay)
+        await response.write_eof()
+        return response
+
+    async def handle_config(self, request):
+        for key, value in (await request.json()).items():
+            if key not in ("delay", "jitter", "error_rate", "slow_rate", "slow_delay", "token_delay"):
+                return web.json_response({"error": f"Unknown setting {key!r}"}, status=400)
+            setattr(self, key, float(value))
+        return web.json_response({key: getattr(self, key)
+                                  for key in ("delay", "jitter", "error_rate", "slow_rate", "slow_delay", "token_delay")})
+
+    async def handle_stats(self, request):
+        return web.json_response({"calls": self.calls, "errors": self.errors, "slow": self.slow})
+
+    def application(self):
+        app = web.Application()
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_put("/config", self.handle_config)
+        app.router.add_post("/{tail:.*}", self.handle_generate)
+        return app
+
+
+async def start_stub(upstream, host="127.0.0.1", port=8765):
+    """Serve ``upstream`` on the running loop; returns the AppRunner to clean up"""
+    runner = web.AppRunner(upstream.application(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.1, help="Base response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with a 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of calls delayed by --slow-delay")
+    parser.add_argument("--slow-delay", type=float, default=5.0)
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed words")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    upstream = StubUpstream(args.delay, args.jitter, args.error_rate, args.slow_rate, args.slow_delay,
+                            args.token_delay, args.seed)
+    print(f"Stub upstream listening on http://{args.host}:{args.port}/models/stub")
+    web.run_app(upstream.application(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Concurrent load test for the BitSafe API.
+
+Builds on backend_test.py's BitSafeAPITester: after an optional
+correctness pass with the existing checks, a pool of async clients hammers
+a weighted mix of endpoints for a fixed duration and the run reports
+requests/sec and p50/p95/p99 latency per endpoint.
+
+Start the backend against the local upstream stub so chat calls never hit
+Hugging Face, either separately (see benchmarks/hf_stub.py) or in-process
+with --stub, then run e.g.
+
+    python benchmarks/load_test.py --concurrency 50 --duration 30 \\
+        --mix root=1,status_list=3,status_create=1,chat=1,scam_alerts=4 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend_test import BitSafeAPITester  # noqa: E402
+from hf_stub import StubUpstream, start_stub  # noqa: E402
+
+CHAT_QUESTIONS = [
+    "How can I reduce my crypto insurance premium?",
+    "What is the safest way to store Bitcoin?",
+    "Does the policy cover smart contract exploits?",
+    "How do I recognise a phishing airdrop?",
+]
+
+DEFAULT_MIX = "root=1,status_list=3,status_create=1,chat=1,scam_alerts=4"
+
+
+def chat_payload(rng, unique_ratio):
+    message = rng.choice(CHAT_QUESTIONS)
+    if rng.random() < unique_ratio:
+        # A distinct question defeats the response cache and reaches the upstream
+        message = f"{message} (ref {rng.getrandbits(48):x})"
+    return {
+        "message": message,
+        "user_info": {"name": "Load Test", "email": "load@example.com", "phone": "+1234567890"},
+    }
+
+
+# Endpoint name -> (method, path, payload factory)
+ENDPOINTS = {
+    "root": ("GET", "", None),
+    "status_list": ("GET", "status?limit=50", None),
+    "status_create": ("POST", "status", lambda rng, args: {"client_name": f"load_{rng.randrange(100)}"}),
+    "chat": ("POST", "chat", lambda rng, args: chat_payload(rng, args.chat_unique_ratio)),
+    "scam_alerts": ("GET", "scam-alerts", None),
+}
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("The request mix needs at least one positive weight")
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class AsyncLoadTester(BitSafeAPITester):
+    """BitSafeAPITester with a concurrent, async load-generation mode"""
+
+    def __init__(self, base_url=None):
+        super().__init__()
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        self.latencies = {}  # endpoint -> [seconds]
+        self.statuses = {}  # endpoint -> {status: count}
+        self.errors = {}  # endpoint -> count of transport errors and unexpected statuses
+
+    def run_checks(self):
+        """Correctness pass with the blocking tester before generating load"""
+        for check in (self.test_root_endpoint, self.test_status_endpoint,
+                      self.test_chat_endpoint, self.test_scam_alerts_endpoint):
+            check()
+        return self.tests_passed == self.tests_run
+
+    async def _request(self, session, name, rng, args):
+        method, path, payload = ENDPOINTS[name]
+        body = payload(rng, args) if payload else None
+        started = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.base_url}/api/{path}", json=body) as response:
+                await response.read()
+                status = str(response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+
+        self.latencies.setdefault(name, []).append(elapsed)
+        counts = self.statuses.setdefault(name, {})
+        counts[status] = counts.get(status, 0) + 1
+        if not status.startswith("2"):
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def _worker(self, session, mix, rng, args, deadline):
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            await self._request(session, rng.choices(names, weights)[0], rng, args)
+
+    async def run_load(self, mix, args):
+        timeout = aiohttp.ClientTimeout(total=args.timeout)
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            if args.warmup:
+                warmup_end = time.perf_counter() + args.warmup
+                await asyncio.gather(*(
+                    self._worker(session, mix, random.Random(args.seed + i), args, warmup_end)
+                    for i in range(args.concurrency)
+                ))
+                self.latencies.clear()
+                self.statuses.clear()
+                self.errors.clear()
+
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                self._worker(session, mix, random.Random(args.seed + i), args, deadline)
+                for i in range(args.concurrency)
+            ))
+            return time.perf_counter() - started
+
+    def summarize(self, elapsed):
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": len(values) / elapsed,
+                "mean_ms": 1000 * sum(values) / len(values),
+                "p50_ms": 1000 * percentile(values, 50),
+                "p95_ms": 1000 * percentile(values, 95),
+                "p99_ms": 1000 * percentile(values, 99),
+                "max_ms": 1000 * values[-1],
+                "statuses": self.statuses.get(name, {}),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "total_requests": total,
+            "total_errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def print_summary(summary):
+    print(f"\n{'endpoint':<15}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, e in summary["endpoints"].items():
+        print(f"{name:<15}{e['requests']:>10}{e['errors']:>8}{e['rps']:>10.1f}"
+              f"{e['p50_ms']:>10.1f}{e['p95_ms']:>10.1f}{e['p99_ms']:>10.1f}")
+    print(f"\n📊 {summary['total_requests']} requests in {summary['elapsed_seconds']:.1f}s "
+          f"= {summary['rps']:.1f} req/s, {summary['total_errors']} errors")
+
+
+async def run(args, mix):
+    runner = upstream = None
+    if args.stub:
+        upstream = StubUpstream(delay=args.stub_delay, error_rate=args.stub_error_rate,
+                                slow_rate=args.stub_slow_rate, slow_delay=args.stub_slow_delay, seed=args.seed)
+        runner = await start_stub(upstream, port=args.stub_port)
+        print(f"Stub upstream on http://127.0.0.1:{args.stub_port}/models/stub "
+              f"(start the server with HF_MODEL_URL pointing at it)")
+    try:
+        tester = AsyncLoadTester(args.base_url)
+        if args.check and not await asyncio.to_thread(tester.run_checks):
+            print("❌ Correctness checks failed; not generating load")
+            return None
+        print(f"\n🔄 {args.concurrency} clients for {args.duration:.0f}s against {tester.base_url}")
+        summary = tester.summarize(await tester.run_load(mix, args))
+        if upstream is not None:
+            summary["stub_upstream"] = {"calls": upstream.calls, "errors": upstream.errors}
+        return summary
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Backend URL (default: BitSafeAPITester's)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Weighted endpoint mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--chat-unique-ratio", type=float, default=0.5,
+                        help="Fraction of chat messages made unique to miss the response cache")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", action="store_true", help="Run the basic correctness checks first")
+    parser.add_argument("--stub", action="store_true", help="Serve the upstream stub from this process")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--stub-delay", type=float, default=0.1)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-slow-rate", type=float, default=0.0)
+    parser.add_argument("--stub-slow-delay", type=float, default=5.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args, args.mix))
+    if summary is None:
+        return 1
+    print_summary(summary)
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        with open(args.output, "w") as f:
+            json.dump({"started_at": datetime.now(timezone.utc).isoformat(), "config": config, **summary},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
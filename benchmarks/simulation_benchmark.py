@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for the Monte Carlo portfolio simulator.
+
+Runs the same seeded simulation with 1, 2, 4, ... worker processes (up to
+the core count), reports trials/sec and speedup for each, and checks that
+every run produced identical figures.
+
+    python benchmarks/simulation_benchmark.py --policies 500 --trials 200000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from pricing import get_rate_table  # noqa: E402
+from simulation import PortfolioSimulator  # noqa: E402
+
+WALLET_TYPES = ["hardware", "software", "exchange"]
+COVERAGE_TYPES = ["scam", "hacking", "smart-contract", "full"]
+SECURITY_MEASURES = ["2fa-cold", "2fa-only", "cold-only", "no-security"]
+DURATIONS = ["1month", "3months", "6months", "1year"]
+
+
+def sample_portfolio(size):
+    """Deterministic mixed portfolio covering every pricing combination"""
+    return [
+        {
+            "wallet_value": 1000.0 * (1 + i % 50),
+            "wallet_type": WALLET_TYPES[i % 3],
+            "coverage_type": COVERAGE_TYPES[(i // 3) % 4],
+            "security_measures": SECURITY_MEASURES[(i // 12) % 4],
+            "duration": DURATIONS[(i // 48) % 4],
+        }
+        for i in range(size)
+    ]
+
+
+def worker_counts(max_workers):
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", type=int, default=500)
+    parser.add_argument("--trials", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    table = get_rate_table()
+    policies = sample_portfolio(args.policies)
+    simulator = PortfolioSimulator()
+    context = multiprocessing.get_context("spawn")
+
+    runs = []
+    reference = None
+    for workers in worker_counts(args.max_workers):
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # Warm the pool so process start-up is not counted
+            simulator.run(table, policies[:1], 1000, seed=0, executor=pool)
+            started = time.perf_counter()
+            result = simulator.run(table, policies, args.trials, seed=args.seed, executor=pool)
+            elapsed = time.perf_counter() - started
+
+        if reference is None:
+            reference = result
+        elif result != reference:
+            print(f"❌ Results with {workers} workers differ from the single-worker run")
+            return 1
+
+        rate = args.trials / elapsed
+        runs.append({"workers": workers, "seconds": elapsed, "trials_per_sec": rate,
+                     "speedup": rate / runs[0]["trials_per_sec"] if runs else 1.0})
+        print(f"workers={workers:<3} {elapsed:8.2f}s  {rate:12,.0f} trials/sec  speedup x{runs[-1]['speedup']:.2f}")
+
+    print(f"✅ Identical results across all worker counts: expected_loss={reference['expected_loss']:,.2f} "
+          f"var_99={reference['var_99']:,.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"policies": args.policies, "trials": args.trials, "seed": args.seed,
+                       "runs": runs, "result": reference}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -738,9 +738,24 @@ const MainContent = () => {
     };
 
     fetchScamAlerts();
-    // Refresh alerts every 2 minutes
-    const interval = setInterval(fetchScamAlerts, 120000);
-    return () => clearInterval(interval);
+
+    // Prefer the server push channel; fall back to polling every 2 minutes
+    if (!window.EventSource) {
+      const interval = setInterval(fetchScamAlerts, 120000);
+      return () => clearInterval(interval);
+    }
+
+    const backendUrl = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
+    const source = new EventSource(`${backendUrl}/api/scam-alerts/stream`);
+    source.addEventListener('snapshot', (event) => {
+      setScamAlerts(JSON.parse(event.data));
+      setAlertsLoading(false);
+    });
+    source.addEventListener('alert', (event) => {
+      const alert = JSON.parse(event.data);
+      setScamAlerts((current) => [alert, ...current].slice(0, 20));
+    });
+    return () => source.close();
   }, []);
 
   // AI Chatbot functions - Updated for new functionality
@@ -792,15 +807,84 @@ const MainContent = () => {
     
     try {
       const backendUrl = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
+      const requestBody = JSON.stringify({
+        message: currentMessage,
+        user_info: userInfo
+      });
+
+      // Stream the answer token by token where the browser supports it
+      if (window.ReadableStream && window.TextDecoder) {
+        const response = await fetch(`${backendUrl}/api/chat/stream`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: requestBody
+        });
+
+        if (!response.ok || !response.body) {
+          throw new Error('Failed to get AI response');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let started = false;
+
+        const updateBotMessage = (update) => {
+          setChatMessages(prev => {
+            const messages = [...prev];
+            messages[messages.length - 1] = { ...messages[messages.length - 1], ...update(messages[messages.length - 1]) };
+            return messages;
+          });
+        };
+
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split('\n\n');
+          buffer = events.pop();
+          for (const rawEvent of events) {
+            const lines = rawEvent.split('\n');
+            const eventLine = lines.find(line => line.startsWith('event: '));
+            const dataLine = lines.find(line => line.startsWith('data: '));
+            if (!eventLine || !dataLine) continue;
+            const eventName = eventLine.slice(7);
+            const data = JSON.parse(dataLine.slice(6));
+
+            if (eventName === 'token') {
+              if (!started) {
+                // First token: replace the typing indicator with the answer
+                started = true;
+                setIsTyping(false);
+                setChatMessages(prev => [...prev, {
+                  type: 'bot',
+                  message: data.text,
+                  timestamp: new Date()
+                }]);
+              } else {
+                updateBotMessage(msg => ({ message: msg.message + data.text }));
+              }
+            } else if (eventName === 'done') {
+              updateBotMessage(() => ({
+                message: data.response,
+                recommendations: data.recommendations
+              }));
+            }
+          }
+        }
+
+        setIsTyping(false);
+        return;
+      }
+
       const response = await fetch(`${backendUrl}/api/chat`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          message: currentMessage,
-          user_info: userInfo
-        })
+        body: requestBody
       });
       
       if (!response.ok) {
@@ -0,0 +1,28 @@
+import contextlib
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# The backend runs as flat modules from backend/ (uvicorn server:app)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def upstream():
+    """Serve an aiohttp handler on localhost: ``async with upstream(handler) as url``"""
+
+    @contextlib.asynccontextmanager
+    async def serve(handler):
+        app = web.Application()
+        app.router.add_post("/", handler)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            yield str(server.make_url("/"))
+        finally:
+            await server.close()
+
+    return serve
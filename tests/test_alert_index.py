@@ -0,0 +1,104 @@
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import scam_feed
+from alert_index import AlertIndex, parse_amount_usd
+
+NOW = datetime(2025, 6, 1)
+
+
+def make_alerts(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            title=f"alert {i}",
+            timestamp=NOW - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+            severity=rng.choice(("high", "medium", "low")),
+            source=rng.choice(("CryptoNews", "DeFiSafety", "ScamAlert")),
+            # Repeated amounts and a few unparsed ones exercise tie-breaking
+            amount_usd=rng.choice((None, rng.randrange(50) * 1e5)),
+        )
+        for i in range(n)
+    ]
+
+
+def brute_force_largest(alerts, limit, severity=None, since=None, until=None):
+    window = sorted(
+        (a for a in alerts
+         if (severity is None or a.severity == severity)
+         and (since is None or a.timestamp >= since)
+         and (until is None or a.timestamp < until)),
+        key=lambda a: a.timestamp,
+    )
+    return sorted(window, key=lambda a: a.amount_usd or 0.0, reverse=True)[:limit]
+
+
+def test_parse_amount_usd():
+    assert parse_amount_usd("$1.5B") == 1.5e9
+    assert parse_amount_usd("$89K") == 89e3
+    assert parse_amount_usd("$1,200") == 1200
+    assert parse_amount_usd("undisclosed") is None
+    assert parse_amount_usd("") is None
+
+
+def test_time_bounded_largest_matches_brute_force():
+    alerts = make_alerts(500)
+    index = AlertIndex(alerts)
+    rng = random.Random(1)
+    for _ in range(200):
+        since = NOW - timedelta(days=rng.uniform(0, 31))
+        until = rng.choice((None, since + timedelta(days=rng.uniform(0, 10))))
+        severity = rng.choice((None, "high", "medium", "low"))
+        limit = rng.randrange(1, 30)
+        expected = brute_force_largest(alerts, limit, severity, since, until)
+        assert index.largest(limit, severity=severity, since=since, until=until) == expected
+
+
+def test_largest_accepts_aware_bounds_and_empty_windows():
+    alerts = make_alerts(50)
+    index = AlertIndex(alerts)
+    since = (NOW - timedelta(days=7)).replace(tzinfo=timezone.utc)
+    assert index.largest(5, since=since) == brute_force_largest(alerts, 5, since=NOW - timedelta(days=7))
+    assert index.largest(5, since=NOW + timedelta(days=1)) == []
+    assert AlertIndex([]).largest(5, until=NOW) == []
+
+
+def test_recent_pages_newest_first():
+    alerts = make_alerts(100)
+    index = AlertIndex(alerts)
+    newest = sorted(alerts, key=lambda a: a.timestamp, reverse=True)
+    assert index.recent(10) == newest[:10]
+    assert index.recent(10, offset=10) == newest[10:20]
+
+
+def test_warm_builds_every_severity_table_up_front():
+    alerts = make_alerts(200)
+    index = AlertIndex(alerts).warm()
+    assert set(index._range_max) == {None, "high", "medium", "low"}
+    tables = dict(index._range_max)
+    since = NOW - timedelta(days=7)
+    for severity in (None, "high", "medium", "low"):
+        assert index.largest(5, severity=severity, since=since) == brute_force_largest(
+            alerts, 5, severity, since=since)
+    assert index._range_max == tables
+    assert AlertIndex([]).warm().largest(5, until=NOW) == []
+
+
+def test_refresh_indexes_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def build_index(alerts):
+        threads.append(threading.current_thread())
+        return scam_feed.AlertIndex(alerts).warm()
+
+    async def gather():
+        return [], []
+
+    monkeypatch.setattr(scam_feed, "build_index", build_index)
+    feed = scam_feed.ScamAlertFeed(gather, list, source_count=1)
+    snapshot = asyncio.run(feed.refresh())
+    assert threads and threads[0] is not threading.main_thread()
+    assert None in snapshot.index._range_max
@@ -0,0 +1,50 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from alert_store import AlertStore, alert_content_hash
+
+
+def all_source_alerts():
+    async def gather():
+        batches = await asyncio.gather(*(fetch() for fetch in server.SCAM_ALERT_SOURCES.values()))
+        return [alert for batch in batches for alert in batch] + server.get_fallback_scam_alerts()
+    return asyncio.run(gather())
+
+
+def new_store():
+    collection = AsyncMongoMockClient()["test"]["scam_alerts"]
+    return AlertStore(collection, server.ScamAlert), collection
+
+
+def test_cross_source_reports_collapse():
+    alerts = all_source_alerts()
+    assert len({alert_content_hash(a) for a in alerts}) == 18
+    store, collection = new_store()
+
+    assert asyncio.run(store.ingest(alerts)) == 15
+    assert store.duplicates == 3
+    titles = {a.title for a in store.alerts()}
+    # The fallback list's rewordings of these incidents are dropped
+    assert "Bybit Exchange Mega Hack: $1.5B Stolen" in titles
+    assert "Bybit Exchange Record Hack: $1.5B Stolen" not in titles
+    assert "Q1 2025 Crypto Hacks: $2B Lost Total" not in titles
+    assert "May 2025 Scams & Hacks: $302M Lost" not in titles
+    # Same amount and article, different incidents
+    assert "DeGods NFT Wallet Compromise: $89K Lost" in titles
+    assert "Discord Scam: Fake Support Bot - $89K Lost" in titles
+    # Same article, different amount
+    assert "Q1 2025 Access Control Exploits: $1.63B" in titles
+    assert asyncio.run(collection.count_documents({})) == 15
+
+
+def test_reingest_is_idempotent_across_restarts():
+    alerts = all_source_alerts()
+    store, collection = new_store()
+    asyncio.run(store.ingest(alerts))
+
+    restarted = AlertStore(collection, server.ScamAlert)
+    assert asyncio.run(restarted.ingest(server.get_fallback_scam_alerts())) == 0
+    assert asyncio.run(restarted.ingest(alerts)) == 0
+    assert len(restarted.alerts()) == 15
@@ -0,0 +1,157 @@
+import asyncio
+import types
+from datetime import datetime, timezone
+
+import server
+from alert_stream import AlertBroadcaster
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def alert(n):
+    return server.ScamAlert(title=f"Scam {n}", description="", amount_lost=f"${n}", source="test",
+                            timestamp=T0, severity="high")
+
+
+def snapshot(*ns):
+    """Feed snapshot holding alerts ``ns``, newest (highest) first like the feed"""
+    return types.SimpleNamespace(alerts=tuple(alert(n) for n in sorted(ns, reverse=True)),
+                                 body=b"[%d]" % len(ns))
+
+
+def events(chunks):
+    return [chunk.split(b"\n")[0] for chunk in chunks if chunk.startswith(b"event:")]
+
+
+def event_ids(chunks):
+    return [line[4:].decode() for chunk in chunks for line in chunk.split(b"\n") if line.startswith(b"id: ")]
+
+
+def read(broadcaster, count, last_event_id=None, current=None):
+    """First ``count`` chunks a subscriber connecting now receives"""
+
+    async def current_snapshot():
+        return current or snapshot()
+
+    async def scenario():
+        stream = broadcaster.stream(current_snapshot, last_event_id)
+        try:
+            return [await stream.__anext__() for _ in range(count)]
+        finally:
+            await stream.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_an_event_id_from_another_worker_gets_a_snapshot():
+    workers = [AlertBroadcaster(), AlertBroadcaster()]
+    for worker in workers:
+        worker.publish_snapshot(snapshot(1))
+        worker.publish_snapshot(snapshot(1, 2, 3))
+    own, other = workers
+    last_event_id = event_ids([payload for _, payload in own._events])[0]
+
+    assert own.epoch != other.epoch
+    assert events(read(own, 2, last_event_id)[1:]) == [b"event: alert"]
+    assert events(read(other, 2, last_event_id)[1:]) == [b"event: snapshot"]
+
+
+def alert_titles(broadcaster):
+    return [payload.split(b'"title":"')[1].split(b'"')[0].decode() for _, payload in broadcaster._events]
+
+
+def test_first_snapshot_is_not_broadcast():
+    broadcaster = AlertBroadcaster()
+    broadcaster.publish_snapshot(snapshot(1, 2))
+    assert not broadcaster._events
+
+    broadcaster.publish_snapshot(snapshot(1, 2, 3, 4))
+    assert alert_titles(broadcaster) == ["Scam 3", "Scam 4"]
+
+
+def test_alerts_are_deduplicated_by_identity():
+    broadcaster = AlertBroadcaster()
+    broadcaster.publish_snapshot(snapshot(1))
+    broadcaster.publish_snapshot(snapshot(1, 2))
+    # Same alert with a new relative timestamp, and one dropped then back
+    moved = snapshot(2)
+    moved.alerts = (alert(2).model_copy(update={"timestamp": T0.replace(hour=5)}),)
+    broadcaster.publish_snapshot(moved)
+    broadcaster.publish_snapshot(snapshot(1, 2))
+    assert alert_titles(broadcaster) == ["Scam 2"]
+
+
+def test_can_resume():
+    broadcaster = AlertBroadcaster(history=2)
+    broadcaster.publish_snapshot(snapshot(0))
+    assert broadcaster._can_resume(broadcaster._event_id(0))
+    for n in range(1, 5):
+        broadcaster.publish_snapshot(snapshot(*range(n + 1)))
+    # Buffer holds events 3 and 4
+    assert broadcaster._can_resume(broadcaster._event_id(4))
+    assert broadcaster._can_resume(broadcaster._event_id(2))
+    assert not broadcaster._can_resume(broadcaster._event_id(1))
+    assert not broadcaster._can_resume(broadcaster._event_id(5))
+    assert not broadcaster._can_resume(None)
+    assert not broadcaster._can_resume("4")
+    assert not broadcaster._can_resume(f"{broadcaster.epoch}-x")
+
+
+def test_ring_buffer_keeps_the_newest_events():
+    broadcaster = AlertBroadcaster(history=3)
+    broadcaster.publish_snapshot(snapshot(0))
+    broadcaster.publish_snapshot(snapshot(*range(6)))
+    assert [event_id for event_id, _ in broadcaster._events] == [3, 4, 5]
+    assert alert_titles(broadcaster) == ["Scam 3", "Scam 4", "Scam 5"]
+
+
+def test_idle_subscribers_get_heartbeats():
+    broadcaster = AlertBroadcaster(heartbeat_interval=0.01)
+    chunks = read(broadcaster, 4)
+    assert chunks[0] == b"retry: 5000\n\n"
+    assert events(chunks[1:2]) == [b"event: snapshot"]
+    assert chunks[2:] == [b": heartbeat\n\n"] * 2
+
+
+def test_resume_inside_the_buffer_sends_only_missed_alerts():
+    broadcaster = AlertBroadcaster(history=4)
+    broadcaster.publish_snapshot(snapshot(0))
+    broadcaster.publish_snapshot(snapshot(0, 1, 2, 3))
+    chunks = read(broadcaster, 3, broadcaster._event_id(1))
+    assert events(chunks[1:]) == [b"event: alert"] * 2
+    assert event_ids(chunks) == [broadcaster._event_id(2), broadcaster._event_id(3)]
+
+
+def test_resume_outside_the_buffer_sends_a_snapshot():
+    broadcaster = AlertBroadcaster(history=2)
+    broadcaster.publish_snapshot(snapshot(0))
+    broadcaster.publish_snapshot(snapshot(*range(6)))
+    current = snapshot(*range(6))
+    chunks = read(broadcaster, 2, broadcaster._event_id(1), current=current)
+    assert events(chunks[1:]) == [b"event: snapshot"]
+    assert chunks[1].endswith(b"data: [6]\n\n")
+    assert event_ids(chunks) == [broadcaster._event_id(5)]
+
+
+def test_connected_subscribers_receive_new_alerts():
+    broadcaster = AlertBroadcaster(heartbeat_interval=5)
+    broadcaster.publish_snapshot(snapshot(0))
+
+    async def current_snapshot():
+        return snapshot(0)
+
+    async def scenario():
+        stream = broadcaster.stream(current_snapshot)
+        try:
+            head = [await stream.__anext__() for _ in range(2)]
+            pending = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            assert broadcaster.subscribers == 1
+            broadcaster.publish_snapshot(snapshot(0, 1))
+            return head + [await asyncio.wait_for(pending, 1)]
+        finally:
+            await stream.aclose()
+
+    chunks = asyncio.run(scenario())
+    assert events(chunks[1:]) == [b"event: snapshot", b"event: alert"]
+    assert broadcaster.subscribers == 0
@@ -0,0 +1,166 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from chat_cache import ChatResponseCache
+from external_integrations import CircuitBreaker, ResilientInference, RetryBudget
+from single_flight import SingleFlight
+
+
+def chat(name, message="How do I lower my premium?"):
+    return server.ChatMessage(
+        message=message,
+        user_info={"name": name, "email": f"{name.lower()}@example.com", "phone": "+1234567890"},
+    )
+
+
+class EchoUpstream:
+    """Answers with the prompt it was sent, so anything personal in it shows up"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, payload, api_key=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return [{"generated_text": payload["inputs"]}]
+
+
+@pytest.fixture
+def echo(monkeypatch):
+    upstream = EchoUpstream(delay=0.05)
+    monkeypatch.setattr(server, "upstream", upstream)
+    monkeypatch.setattr(server, "chat_cache", ChatResponseCache())
+    monkeypatch.setattr(server, "inflight_chats", SingleFlight())
+    return upstream
+
+
+def test_prompt_does_not_carry_the_user_name():
+    payload = server.build_inference_payload(chat("Alice").message)
+    assert "Alice" not in payload["inputs"]
+
+
+def test_cached_answer_is_not_personal(echo):
+    alice, _ = asyncio.run(server.generate_ai_reply(chat("Alice"), "key"))
+    bob, _ = asyncio.run(server.generate_ai_reply(chat("Bob"), "key"))
+    assert echo.calls == 1
+    assert bob == alice
+    assert "Alice" not in bob
+
+
+def test_concurrent_identical_prompts_share_one_call(echo):
+    async def scenario():
+        return await asyncio.gather(
+            *(server.generate_ai_reply(chat(name), "key") for name in ("Alice", "Bob", "Carol")),
+            server.generate_ai_reply(chat("Dave", "Is cold storage covered?"), "key"),
+        )
+
+    replies = asyncio.run(scenario())
+    assert echo.calls == 2
+    assert server.inflight_chats.coalesced == 2
+    assert replies[0] == replies[1] == replies[2]
+    for name in ("Alice", "Bob", "Carol"):
+        assert name not in replies[0][0]
+    assert "cold storage" in replies[3][0]
+
+
+def test_concurrent_variants_of_a_question_share_one_call(echo):
+    variants = ("How do I lower my premium?", "how do i lower my premium", "HOW DO I LOWER MY PREMIUM!!")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(server.generate_ai_reply(chat("Alice", message), "key") for message in variants))
+
+    replies = asyncio.run(scenario())
+    assert echo.calls == 1
+    assert server.inflight_chats.coalesced == 2
+    assert replies[0] == replies[1] == replies[2]
+
+
+class StreamingUpstream:
+    def __init__(self, *chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    async def generate_stream(self, payload, api_key=None):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+
+
+class RecordingBuffer:
+    def __init__(self):
+        self.puts = []
+
+    async def put(self, collection_name, document):
+        self.puts.append((collection_name, document))
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    buffer = RecordingBuffer()
+    monkeypatch.setattr(server, "write_buffer", buffer)
+    monkeypatch.setattr(server, "chat_cache", ChatResponseCache())
+    return buffer
+
+
+def parse(event):
+    lines = dict(line.split(": ", 1) for line in event.decode().strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+
+def replay(chat_data, on_event=None):
+    """Parsed events of one streamed reply; ``on_event`` runs as each arrives"""
+
+    async def scenario():
+        events = []
+        async for event in server.stream_ai_reply(chat_data, "key", "message-1"):
+            events.append(parse(event))
+            if on_event is not None:
+                on_event(*events[-1])
+        return events
+
+    return asyncio.run(scenario())
+
+
+def test_stream_sends_tokens_then_a_done_event(monkeypatch, buffer):
+    monkeypatch.setattr(server, "upstream", StreamingUpstream("Use ", "a hardware ", "wallet."))
+    events = replay(chat("Alice"))
+    assert events == [
+        ("token", {"text": "Use "}),
+        ("token", {"text": "a hardware "}),
+        ("token", {"text": "wallet."}),
+        ("done", {"response": "Use a hardware wallet.",
+                  "recommendations": list(server.UPSTREAM_RECOMMENDATIONS)}),
+    ]
+
+
+def test_stream_queues_the_answer_only_once_complete(monkeypatch, buffer):
+    monkeypatch.setattr(server, "upstream", StreamingUpstream("Use ", "a hardware ", "wallet."))
+    puts_seen = []
+    replay(chat("Alice"), lambda name, data: puts_seen.append((name, len(buffer.puts))))
+    assert puts_seen == [("token", 0)] * 3 + [("done", 1)]
+    (collection_name, document), = buffer.puts
+    assert collection_name == "ai_responses"
+    assert document["user_id"] == "message-1"
+    assert document["response"] == "Use a hardware wallet."
+
+
+def test_stream_falls_back_while_the_breaker_is_open(monkeypatch, buffer):
+    client = StreamingUpstream("never sent")
+    breaker = CircuitBreaker(window=4, min_calls=2, open_seconds=30)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    monkeypatch.setattr(server, "upstream", ResilientInference(client, breaker, RetryBudget()))
+
+    events = replay(chat("Alice", "Is cold storage covered?"))
+    assert client.calls == 0
+    (token, tokens), (done, reply) = events
+    assert (token, done) == ("token", "done")
+    assert tokens["text"] == reply["response"]
+    assert "cold storage" in reply["response"]
+    assert reply["recommendations"] == list(server.FALLBACK_RECOMMENDATIONS)
+    assert buffer.puts[0][1]["response"] == reply["response"]
@@ -0,0 +1,41 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from db_indexes import IndexSpec, declared_indexes, reconcile_indexes
+
+
+def test_creates_missing_indexes_once():
+    db = AsyncMongoMockClient()["test_indexes"]
+    first = asyncio.run(reconcile_indexes(db))
+    assert first["status_checks"]["created"] == ["id_unique", "timestamp_id", "client_name_timestamp_id"]
+    second = asyncio.run(reconcile_indexes(db))
+    for collection_name in declared_indexes():
+        assert second[collection_name]["created"] == []
+        assert second[collection_name]["failed"] == {}
+
+
+def test_reports_drift_and_undeclared_indexes():
+    db = AsyncMongoMockClient()["test_indexes"]
+    asyncio.run(db.status_checks.create_index([("id", 1)], name="id_unique"))
+    asyncio.run(db.status_checks.create_index([("client_name", 1)], name="by_client"))
+    report = asyncio.run(reconcile_indexes(db))["status_checks"]
+    assert report["drifted"] == ["id_unique"]  # declared unique, built without it
+    assert report["undeclared"] == ["by_client"]
+
+
+def test_failed_index_is_reported_and_the_rest_carry_on():
+    db = AsyncMongoMockClient()["test_indexes"]
+    asyncio.run(db.status_checks.insert_many([{"id": "dup"}, {"id": "dup"}]))
+    specs = {
+        "status_checks": [
+            IndexSpec("id_unique", [("id", 1)], unique=True),
+            IndexSpec("timestamp", [("timestamp", -1)]),
+        ],
+        "chat_messages": [IndexSpec("id_unique", [("id", 1)], unique=True)],
+    }
+    report = asyncio.run(reconcile_indexes(db, specs))
+    assert report["status_checks"]["drifted"] == ["id_unique"]
+    assert "id_unique" in report["status_checks"]["failed"]
+    assert report["status_checks"]["created"] == ["timestamp"]
+    assert report["chat_messages"]["created"] == ["id_unique"]
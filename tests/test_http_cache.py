@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+from starlette.requests import Request
+
+from http_cache import conditional_response
+
+ETAG = '"abc123"'
+MODIFIED = datetime(2024, 5, 1, 12, 0, 0, 500000)
+MODIFIED_HTTP = "Wed, 01 May 2024 12:00:00 GMT"
+
+
+def respond(**headers):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    }
+    return conditional_response(Request(scope), b"[]", ETAG, MODIFIED, headers={"Cache-Control": "public"})
+
+
+def test_plain_request_gets_the_body_and_validators():
+    response = respond()
+    assert response.status_code == 200
+    assert response.body == b"[]"
+    assert response.headers["etag"] == ETAG
+    assert response.headers["last-modified"] == MODIFIED_HTTP
+    assert response.headers["cache-control"] == "public"
+
+
+@pytest.mark.parametrize("if_none_match, status", [
+    (ETAG, 304),
+    (f"W/{ETAG}", 304),
+    (f'"other", {ETAG}', 304),
+    ("*", 304),
+    ('"other"', 200),
+    ("abc123", 200),
+])
+def test_if_none_match(if_none_match, status):
+    response = respond(if_none_match=if_none_match)
+    assert response.status_code == status
+    assert response.headers["etag"] == ETAG
+    if status == 304:
+        assert response.body == b""
+
+
+@pytest.mark.parametrize("if_modified_since, status", [
+    (MODIFIED_HTTP, 304),
+    ("Thu, 02 May 2024 00:00:00 GMT", 304),
+    ("Wed, 01 May 2024 11:59:59 GMT", 200),
+    ("not a date", 200),
+])
+def test_if_modified_since(if_modified_since, status):
+    assert respond(if_modified_since=if_modified_since).status_code == status
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    later = (MODIFIED + timedelta(days=1)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    assert respond(if_none_match='"other"', if_modified_since=later).status_code == 200
+    assert respond(if_none_match=ETAG, if_modified_since="Mon, 01 Jan 2024 00:00:00 GMT").status_code == 304
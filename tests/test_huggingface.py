@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from external_integrations import HuggingFaceClient, InferenceError
+
+
+def generate(upstream, handler):
+    async def scenario():
+        async with upstream(handler) as url:
+            client = HuggingFaceClient(url)
+            try:
+                return await client.generate({"inputs": "hi"}, "key")
+            finally:
+                await client.close()
+
+    return asyncio.run(scenario())
+
+
+def replying(body):
+    async def handler(request):
+        return web.json_response(body)
+
+    return handler
+
+
+@pytest.mark.parametrize("body", [[{"generated_text": "hello"}], []])
+def test_generate_returns_a_generation_list(upstream, body):
+    assert generate(upstream, replying(body)) == body
+
+
+@pytest.mark.parametrize("body", [
+    {"error": "Model is loading"},
+    [{"text": "hello"}],
+    [{"generated_text": None}],
+    ["hello"],
+    "hello",
+])
+def test_generate_rejects_a_malformed_body(upstream, body):
+    with pytest.raises(InferenceError, match="Malformed"):
+        generate(upstream, replying(body))
+
+
+def test_generate_rejects_a_body_that_is_not_json(upstream):
+    async def html(request):
+        return web.Response(text="<html>502 Bad Gateway</html>")
+
+    with pytest.raises(InferenceError, match="Malformed"):
+        generate(upstream, html)
+
+
+def test_generate_keeps_the_upstream_status(upstream):
+    async def loading(request):
+        return web.json_response({"error": "Model is loading"}, status=503)
+
+    with pytest.raises(InferenceError) as raised:
+        generate(upstream, loading)
+    assert raised.value.status == 503
+
+
+def stream(upstream, handler):
+    async def scenario():
+        async with upstream(handler) as url:
+            client = HuggingFaceClient(url)
+            try:
+                return [chunk async for chunk in client.generate_stream({"inputs": "hi"}, "key")]
+            finally:
+                await client.close()
+
+    return asyncio.run(scenario())
+
+
+def sending(*lines):
+    async def handler(request):
+        assert (await request.json())["stream"] is True
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for line in lines:
+            await response.write(line.encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    return handler
+
+
+def test_stream_yields_token_text_and_skips_special_tokens(upstream):
+    chunks = stream(upstream, sending(
+        ": keep-alive",
+        'data: {"token": {"id": 1, "text": "Use", "special": false}}',
+        "",
+        'data: {"token": {"id": 2, "text": " a hardware wallet", "special": false}}',
+        'data: {"token": {"id": 3, "text": "</s>", "special": true}, "generated_text": "Use a hardware wallet"}',
+    ))
+    assert chunks == ["Use", " a hardware wallet"]
+
+
+def test_stream_falls_back_to_a_plain_json_body(upstream):
+    assert stream(upstream, replying([{"generated_text": "whole answer"}])) == ["whole answer"]
+    assert stream(upstream, replying([])) == []
+
+
+@pytest.mark.parametrize("handler", [sending("data: {not json"), replying({"error": "Model is loading"})])
+def test_stream_rejects_malformed_data(upstream, handler):
+    with pytest.raises(InferenceError, match="Malformed"):
+        stream(upstream, handler)
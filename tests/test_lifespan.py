@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    import motor.motor_asyncio
+    shared = AsyncMongoMockClient()
+    monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", lambda *args, **kwargs: shared)
+    monkeypatch.setenv("MONGO_URL", "mongodb://test")
+    monkeypatch.setenv("DB_NAME", "test_lifespan")
+    return shared
+
+
+def test_lifespan_starts_and_stops(mongo):
+    app = server.create_app()
+
+    async def scenario():
+        async with server.lifespan(app):
+            assert server.db is not None
+            assert server.hf_client.started
+            assert server.log_listener._thread is not None
+        assert not server.hf_client.started
+        assert server.log_listener._thread is None
+
+    asyncio.run(scenario())
+    assert not server.lifespan_active
+
+
+def test_only_one_lifespan_at_a_time(mongo):
+    async def scenario():
+        async with server.lifespan(server.create_app()):
+            with pytest.raises(RuntimeError):
+                async with server.lifespan(server.create_app()):
+                    pass
+
+    asyncio.run(scenario())
+    assert not server.lifespan_active
+
+
+def test_failed_startup_stops_the_log_listener(mongo, monkeypatch):
+    def broken_connect():
+        raise RuntimeError("no Mongo")
+
+    monkeypatch.setattr(server, "connect_db", broken_connect)
+
+    async def scenario():
+        async with server.lifespan(server.create_app()):
+            pass
+
+    with pytest.raises(RuntimeError, match="no Mongo"):
+        asyncio.run(scenario())
+    assert server.log_listener._thread is None
+    assert not server.lifespan_active
@@ -0,0 +1,28 @@
+import io
+import json
+import logging
+
+import logging_setup
+
+
+def test_uvicorn_loggers_go_through_the_queue(monkeypatch):
+    out = io.StringIO()
+    monkeypatch.setattr(logging_setup.sys, "stdout", out)
+    access = logging.getLogger("uvicorn.access")
+    access.addHandler(logging.StreamHandler(io.StringIO()))
+    monkeypatch.setattr(access, "propagate", False)
+    root = logging.getLogger()
+    root_handlers, root_level = root.handlers[:], root.level
+
+    listener = logging_setup.configure_logging(level="INFO")
+    try:
+        access.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:1", "GET", "/api/", "1.1", 200)
+    finally:
+        listener.stop()
+        root.handlers[:] = root_handlers
+        root.setLevel(root_level)
+
+    assert access.handlers == [] and access.propagate
+    entry = json.loads(out.getvalue())
+    assert entry["logger"] == "uvicorn.access"
+    assert entry["message"] == '127.0.0.1:1 - "GET /api/ HTTP/1.1" 200'
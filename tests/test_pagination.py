@@ -0,0 +1,179 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from pagination import aggregate_page, decode_cursor, encode_cursor, fetch_page, keyset_after
+
+T0 = datetime(2025, 6, 1, 12, 0, 0, 123000)
+
+
+def status_docs():
+    # Five documents share one timestamp, so pages must break ties on id
+    times = [T0 + timedelta(seconds=1)] + [T0] * 5 + [T0 - timedelta(seconds=1)]
+    return [{"id": f"id-{i}", "client_name": "c", "timestamp": t} for i, t in enumerate(times)]
+
+
+def newest_first(docs):
+    return [d["id"] for d in sorted(docs, key=lambda d: (d["timestamp"], d["id"]), reverse=True)]
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test_pagination"]
+
+
+def walk(page, limit):
+    """Follow next cursors from the first page to the last"""
+    async def scenario():
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = keyset_after(cursor) if cursor else {}
+            docs, cursor = await page(query, limit)
+            ids += [d["id"] for d in docs]
+            pages += 1
+            if cursor is None:
+                return ids, pages
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 7, 10])
+def test_fetch_page_walks_equal_timestamps_without_gaps(db, limit):
+    docs = status_docs()
+    asyncio.run(db.status_checks.insert_many([dict(d) for d in docs]))
+    ids, pages = walk(lambda query, limit: fetch_page(db.status_checks, query, limit, {"_id": 0}), limit)
+    assert ids == newest_first(docs)
+    assert pages == max(1, -(-len(docs) // limit))
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_aggregate_page_walks_equal_timestamps_and_joins(db, limit):
+    docs = status_docs()
+    asyncio.run(db.chat_messages.insert_many([dict(d) for d in docs]))
+    asyncio.run(db.ai_responses.insert_many(
+        [{"id": f"r-{d['id']}", "user_id": d["id"], "response": f"re {d['id']}"} for d in docs]))
+    stages = [
+        {"$lookup": {"from": "ai_responses", "localField": "id", "foreignField": "user_id", "as": "replies"}},
+        {"$project": {"_id": 0, "id": 1, "timestamp": 1, "reply": {"$arrayElemAt": ["$replies.response", 0]}}},
+    ]
+
+    async def page(query, limit):
+        rows, cursor = await aggregate_page(db.chat_messages, query, limit, stages)
+        assert all(row["reply"] == f"re {row['id']}" for row in rows)
+        return rows, cursor
+
+    ids, _ = walk(page, limit)
+    assert ids == newest_first(docs)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(T0, "id-3")) == (T0, "id-3")
+    assert "=" not in encode_cursor(T0, "id-3")
+
+
+def b64(raw):
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    "é",
+    b64(b"\xff\xfe"),
+    b64(b"not json"),
+    b64(b"null"),
+    b64(b"[]"),
+    b64(b'["2025-06-01T12:00:00"]'),
+    b64(b'[1, "id"]'),
+    b64(b'["yesterday", "id"]'),
+    b64(b'[["2025"], "id"]'),
+])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def api(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+
+def test_status_endpoint_pages_and_rejects_bad_cursors(db, monkeypatch):
+    docs = status_docs()
+    asyncio.run(db.status_checks.insert_many([dict(d) for d in docs]))
+
+    async def scenario():
+        async with api(db, monkeypatch) as client:
+            ids, params = [], {"limit": 3}
+            while True:
+                response = await client.get("/api/status", params=params)
+                assert response.status_code == 200
+                ids += [row["id"] for row in response.json()]
+                if "X-Next-Cursor" not in response.headers:
+                    break
+                params = {"limit": 3, "after": response.headers["X-Next-Cursor"]}
+            bad = await client.get("/api/status", params={"after": "garbage"})
+            return ids, bad.status_code
+
+    ids, bad_status = asyncio.run(scenario())
+    assert ids == newest_first(docs)
+    assert bad_status == 400
+
+
+def test_chat_history_endpoint_pages_one_users_exchanges(db, monkeypatch):
+    messages = [
+        {"id": f"m-{i}", "message": f"q{i}", "timestamp": T0 if i < 4 else T0 - timedelta(minutes=i),
+         "user_info": {"name": "A", "email": "a@example.com" if i % 5 else "b@example.com", "phone": "1"}}
+        for i in range(10)
+    ]
+    asyncio.run(db.chat_messages.insert_many([dict(m) for m in messages]))
+    asyncio.run(db.ai_responses.insert_one(
+        {"id": "r-1", "user_id": "m-1", "response": "answer", "recommendations": ["x"], "timestamp": T0}))
+
+    monkeypatch.setattr(server, "CHAT_HISTORY_TOKEN", "secret")
+
+    async def scenario():
+        async with api(db, monkeypatch) as client:
+            rows, params = [], {"email": "a@example.com", "limit": 3}
+            while True:
+                response = await client.get(
+                    "/api/chat/history", params=params, headers={"X-History-Token": "secret"})
+                assert response.status_code == 200
+                rows += response.json()
+                if "X-Next-Cursor" not in response.headers:
+                    return rows
+                params = {**params, "after": response.headers["X-Next-Cursor"]}
+
+    rows = asyncio.run(scenario())
+    own = [m for m in messages if m["user_info"]["email"] == "a@example.com"]
+    assert [row["id"] for row in rows] == newest_first(own)
+    answered = next(row for row in rows if row["id"] == "m-1")
+    assert answered["response"] == "answer" and answered["recommendations"] == ["x"]
+    assert next(row for row in rows if row["id"] == "m-2")["recommendations"] == []
+
+
+@pytest.mark.parametrize("token, headers, status", [
+    ("secret", {}, 403),
+    ("secret", {"X-History-Token": "guess"}, 403),
+    (None, {"X-History-Token": "secret"}, 404),
+])
+def test_chat_history_needs_the_history_token(db, monkeypatch, token, headers, status):
+    asyncio.run(db.chat_messages.insert_one(
+        {"id": "m-1", "message": "private", "timestamp": T0,
+         "user_info": {"name": "A", "email": "a@example.com", "phone": "1"}}))
+    monkeypatch.setattr(server, "CHAT_HISTORY_TOKEN", token)
+
+    async def scenario():
+        async with api(db, monkeypatch) as client:
+            return await client.get(
+                "/api/chat/history", params={"email": "a@example.com"}, headers=headers)
+
+    response = asyncio.run(scenario())
+    assert response.status_code == status
+    assert "private" not in response.text
@@ -0,0 +1,139 @@
+import asyncio
+from itertools import product
+
+import httpx
+import pytest
+
+import pricing
+import server
+from pricing import RateTable, get_rate_table, quote_premium, quote_premiums
+
+# calculatePremium from frontend/src/App.js, transcribed as-is
+JS_WALLET = {"hardware": 0.5, "software": 1.0, "exchange": 1.8}
+JS_COVERAGE = {"scam": 0.8, "hacking": 1.0, "smart-contract": 1.2, "full": 1.5}
+JS_SECURITY = {"2fa-cold": 0.6, "2fa-only": 0.8, "cold-only": 0.7, "no-security": 1.5}
+JS_DURATION = {"1month": 1.0, "3months": 2.8, "6months": 5.4, "1year": 10.0}
+
+
+def calculate_premium(wallet_value, wallet_type, coverage_type, security_measures, duration):
+    risk_multiplier = JS_WALLET[wallet_type] * JS_COVERAGE[coverage_type] * JS_SECURITY[security_measures]
+    annual_premium = wallet_value * 0.025 * risk_multiplier
+    premium = annual_premium * JS_DURATION[duration] / 12
+    risk_level = "Low"
+    if risk_multiplier > 1.5:
+        risk_level = "High"
+    elif risk_multiplier > 1.0:
+        risk_level = "Medium"
+    return premium, risk_level
+
+
+ALL_POLICIES = list(product(JS_WALLET, JS_COVERAGE, JS_SECURITY, JS_DURATION))
+
+
+@pytest.mark.parametrize("policy, premium, risk_level", [
+    ((10000, "hardware", "scam", "2fa-cold", "1month"), 5.0, "Low"),
+    ((10000, "exchange", "full", "no-security", "1year"), 843.75, "High"),
+    ((2400, "software", "hacking", "no-security", "3months"), 21.0, "Medium"),
+    ((0, "software", "smart-contract", "2fa-only", "6months"), 0.0, "Low"),
+])
+def test_quote_matches_the_frontend(policy, premium, risk_level):
+    quote = quote_premium(get_rate_table(), *policy)
+    assert calculate_premium(*policy) == (pytest.approx(premium), risk_level)
+    assert quote["premium"] == pytest.approx(premium, rel=1e-12)
+    assert quote["risk_level"] == risk_level
+
+
+def test_every_combination_matches_the_frontend():
+    table = get_rate_table()
+    for policy in ALL_POLICIES:
+        premium, risk_level = calculate_premium(12345.67, *policy)
+        quote = quote_premium(table, 12345.67, *policy)
+        assert quote["premium"] == pytest.approx(premium, rel=1e-12), policy
+        assert quote["risk_level"] == risk_level, policy
+
+
+def test_risk_level_boundaries_are_strict(monkeypatch):
+    monkeypatch.setattr(pricing, "_RATE_MATRICES", {})
+    table = RateTable(
+        version="boundaries", base_rate=0.025, wallet={"w": 1.0}, coverage={"c": 1.0},
+        security={"at-medium": 1.0, "over-medium": 1.001, "at-high": 1.5, "over-high": 1.501},
+        duration={"1month": 1.0},
+    )
+    levels = {s: quote_premium(table, 1, "w", "c", s, "1month")["risk_level"] for s in table.security}
+    assert levels == {"at-medium": "Low", "over-medium": "Medium", "at-high": "Medium", "over-high": "High"}
+
+
+def test_batch_equals_single_quotes():
+    table = get_rate_table()
+    values = [1000.0 * (i + 1) for i in range(len(ALL_POLICIES))]
+    batch = quote_premiums(table, values, *zip(*ALL_POLICIES))
+    for i, policy in enumerate(ALL_POLICIES):
+        quote = quote_premium(table, values[i], *policy)
+        assert batch["premiums"][i] == quote["premium"]
+        assert batch["risk_multipliers"][i] == quote["risk_multiplier"]
+        assert batch["risk_levels"][i] == quote["risk_level"]
+
+
+def call(method, path, **kwargs):
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def post(path, body):
+    return call("POST", path, json=body)
+
+
+POLICY = {"wallet_value": 5000, "wallet_type": "software", "coverage_type": "full",
+          "security_measures": "2fa-only", "duration": "6months"}
+
+
+def test_quote_endpoints_agree():
+    single = post("/api/quote", POLICY).json()
+    batch = post("/api/quote/batch", {"policies": [POLICY, POLICY]}).json()
+    assert batch["premiums"] == [single["premium"]] * 2
+    assert batch["risk_levels"] == [single["risk_level"]] * 2
+    assert batch["rate_table_version"] == single["rate_table_version"]
+
+
+@pytest.mark.parametrize("field", ["wallet_type", "coverage_type", "security_measures", "duration"])
+def test_unknown_label_is_a_422(field):
+    bad = {**POLICY, field: "paper"}
+    for response in (post("/api/quote", bad), post("/api/quote/batch", {"policies": [POLICY, bad]})):
+        assert response.status_code == 422
+        assert field in response.json()["detail"]
+
+
+def test_matrix_agrees_with_quote_premium():
+    response = call("GET", "/api/quote/matrix")
+    assert response.status_code == 200
+    matrix = response.json()
+    table = get_rate_table()
+    assert matrix["rate_table_version"] == table.version
+    assert len(matrix["entries"]) == len(ALL_POLICIES)
+    for entry in matrix["entries"]:
+        policy = (entry["wallet_type"], entry["coverage_type"], entry["security_measures"], entry["duration"])
+        quote = quote_premium(table, 2500.0, *policy)
+        assert 2500.0 * entry["unit_premium"] == pytest.approx(quote["premium"], rel=1e-12)
+        assert entry["risk_multiplier"] == quote["risk_multiplier"]
+        assert entry["risk_level"] == quote["risk_level"]
+
+
+def test_matrix_etag_is_stable_and_revalidates():
+    first, second = call("GET", "/api/quote/matrix"), call("GET", "/api/quote/matrix")
+    etag = first.headers["ETag"]
+    assert second.headers["ETag"] == etag
+    assert pricing.build_rate_matrix(get_rate_table()).etag == etag
+
+    revalidated = call("GET", "/api/quote/matrix", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["ETag"] == etag
+    assert call("GET", "/api/quote/matrix", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_matrix_for_an_unknown_version_is_a_404():
+    assert call("GET", "/api/quote/matrix", params={"rate_table_version": "1999-01"}).status_code == 404
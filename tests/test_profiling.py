@@ -0,0 +1,27 @@
+from profiling import ProfilerMiddleware
+
+
+def middleware(**kwargs):
+    return ProfilerMiddleware(app=None, sampler=None, **kwargs)
+
+
+def scope(*headers):
+    return {"type": "http", "headers": list(headers)}
+
+
+def test_profile_header_must_match_the_admin_token():
+    profiler = middleware(admin_token="s3cret")
+    assert profiler._wants_profile(scope((b"x-profile", b"s3cret")))
+    assert not profiler._wants_profile(scope((b"x-profile", b"s3cre")))
+    assert not profiler._wants_profile(scope((b"x-profile", b"")))
+    assert not profiler._wants_profile(scope())
+
+
+def test_profile_header_ignored_without_a_token():
+    profiler = middleware()
+    assert not profiler._wants_profile(scope((b"x-profile", b"anything")))
+
+
+def test_sample_rate_profiles_without_a_header():
+    assert middleware(sample_rate=1.0)._wants_profile(scope())
+    assert not middleware(sample_rate=0.0)._wants_profile(scope())
@@ -0,0 +1,254 @@
+import asyncio
+import types
+
+import pytest
+from aiohttp import web
+
+from external_integrations import (
+    CircuitBreaker, CircuitOpenError, HuggingFaceClient, InferenceError, ResilientInference,
+    RetryBudget,
+)
+from external_integrations import resilience
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Only the module's view of time: the event loop keeps the real clock
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+class FakeClient:
+    """Stands in for HuggingFaceClient; each call pops the next behaviour"""
+
+    def __init__(self, *behaviours):
+        self.behaviours = list(behaviours)
+        self.calls = 0
+
+    async def generate(self, payload, api_key=None):
+        self.calls += 1
+        behaviour = self.behaviours.pop(0) if self.behaviours else "ok"
+        if isinstance(behaviour, (int, float)):
+            await asyncio.sleep(behaviour)
+            return f"slow {self.calls}"
+        if isinstance(behaviour, BaseException):
+            raise behaviour
+        return f"answer {self.calls}"
+
+    async def generate_stream(self, payload, api_key=None):
+        self.calls += 1
+        behaviour = self.behaviours.pop(0) if self.behaviours else "ok"
+        for word in ("one ", "two ", "three"):
+            if isinstance(behaviour, BaseException):
+                raise behaviour
+            yield word
+            if isinstance(behaviour, (int, float)):
+                await asyncio.sleep(behaviour)
+
+
+def tripped_breaker(**kwargs):
+    breaker = CircuitBreaker(window=4, min_calls=2, open_seconds=30, **kwargs)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_breaker_opens_on_failure_rate(clock):
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5)
+    for success in (True, False, True):
+        breaker.record(success, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 1
+    assert not breaker.allow()
+
+
+def test_breaker_opens_on_slow_calls(clock):
+    breaker = CircuitBreaker(window=2, min_calls=2, slow_call_seconds=1.0, slow_call_rate=1.0)
+    breaker.record(True, 2.0)
+    breaker.record(True, 3.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_open_half_open_closed(clock):
+    breaker = tripped_breaker()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = tripped_breaker()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 2
+    assert not breaker.allow()
+
+
+def test_breaker_released_probe_frees_the_slot(clock):
+    breaker = tripped_breaker()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_breaker_replaces_a_lost_probe(clock):
+    breaker = tripped_breaker()
+    clock.now += 31
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_retry_budget_caps_extra_attempts():
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def inference(client, breaker=None, **kwargs):
+    breaker = breaker or CircuitBreaker(window=4, min_calls=4)
+    kwargs.setdefault("deadline", 1.0)
+    return ResilientInference(client, breaker, RetryBudget(), **kwargs)
+
+
+def test_generate_retries_a_failed_attempt():
+    client = FakeClient(InferenceError("503"), "ok")
+    wrapped = inference(client, max_retries=1)
+    assert asyncio.run(wrapped.generate({}, "key")) == "answer 2"
+    assert wrapped.retries == 1
+
+
+def test_generate_gives_up_after_max_retries():
+    client = FakeClient(InferenceError("503"), InferenceError("503"))
+    wrapped = inference(client, max_retries=1)
+    with pytest.raises(InferenceError):
+        asyncio.run(wrapped.generate({}, "key"))
+    assert client.calls == 2
+
+
+def test_generate_hedges_a_slow_attempt():
+    client = FakeClient(0.5, "ok")
+    wrapped = inference(client, hedge_after=0.05, max_retries=0)
+    assert asyncio.run(wrapped.generate({}, "key")) == "answer 2"
+    assert wrapped.hedges == 1
+
+
+def test_generate_deadline_raises_inference_error():
+    wrapped = inference(FakeClient(0.5), deadline=0.05, max_retries=0)
+    with pytest.raises(InferenceError):
+        asyncio.run(wrapped.generate({}, "key"))
+    assert len(wrapped.breaker._calls) == 1
+
+
+def test_generate_rejects_while_open(clock):
+    client = FakeClient()
+    wrapped = inference(client, breaker=tripped_breaker())
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(wrapped.generate({}, "key"))
+    assert client.calls == 0
+
+
+def test_cancelled_probe_gives_its_slot_back(clock):
+    breaker = tripped_breaker()
+    clock.now += 31
+    wrapped = inference(FakeClient(10), breaker=breaker)
+
+    async def scenario():
+        task = asyncio.create_task(wrapped.generate({}, "key"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_probe_with_malformed_body_reopens(clock, upstream):
+    breaker = tripped_breaker()
+    clock.now += 31
+
+    async def not_json(request):
+        return web.Response(text="<html>502 Bad Gateway</html>")
+
+    async def scenario():
+        async with upstream(not_json) as url:
+            client = HuggingFaceClient(url)
+            try:
+                await inference(client, breaker=breaker, max_retries=0).generate({}, "key")
+            finally:
+                await client.close()
+
+    with pytest.raises(InferenceError, match="Malformed"):
+        asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_stream_records_success():
+    wrapped = inference(FakeClient())
+
+    async def scenario():
+        return [chunk async for chunk in wrapped.generate_stream({}, "key")]
+
+    assert asyncio.run(scenario()) == ["one ", "two ", "three"]
+    assert wrapped.breaker._calls[-1] == (False, False)
+
+
+def test_stream_consumer_stopping_early_releases_probe(clock):
+    breaker = tripped_breaker()
+    clock.now += 31
+    wrapped = inference(FakeClient(), breaker=breaker)
+
+    async def scenario():
+        stream = wrapped.generate_stream({}, "key")
+        assert await stream.__anext__() == "one "
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_stream_unexpected_error_reopens(clock):
+    breaker = tripped_breaker()
+    clock.now += 31
+    wrapped = inference(FakeClient(ValueError("bad chunk")), breaker=breaker)
+
+    async def scenario():
+        return [chunk async for chunk in wrapped.generate_stream({}, "key")]
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,147 @@
+import asyncio
+import multiprocessing
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from shared_state import SharedStateFile
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    state = SharedStateFile(str(tmp_path / "state"), capacity=64 * 1024)
+    state.open()
+    yield state
+    state.close()
+
+
+def test_read_before_any_publish(state_file):
+    assert state_file.version == 0
+    assert state_file.read() == (0, None)
+
+
+def test_publish_alternates_slots(state_file, tmp_path):
+    reader = SharedStateFile(state_file.path, capacity=state_file.capacity)
+    reader.open()
+    try:
+        for i in range(1, 5):
+            payload = f"payload {i}".encode() * i
+            assert state_file.publish(payload) == i
+            assert reader.read() == (i, payload)
+    finally:
+        reader.close()
+
+
+def test_oversized_payload_is_refused(state_file):
+    state_file.publish(b"kept")
+    with pytest.raises(ValueError):
+        state_file.publish(b"x" * (state_file.capacity + 1))
+    assert state_file.read() == (1, b"kept")
+
+
+def test_one_producer_at_a_time(state_file):
+    other = SharedStateFile(state_file.path, capacity=state_file.capacity)
+    other.open()
+    try:
+        assert state_file.acquire_producer()
+        assert not other.acquire_producer()
+        state_file.close()
+        assert other.acquire_producer()
+    finally:
+        other.close()
+
+
+def _publish_forever(path, capacity, count):
+    state = SharedStateFile(path, capacity=capacity)
+    state.open()
+    for version in range(1, count + 1):
+        # Each payload's length and contents both encode its version
+        state.publish(bytes([version % 251]) * (1000 + version % 5000))
+    state.close()
+
+
+def test_reader_never_sees_a_torn_payload(state_file):
+    count = 20000
+    writer = multiprocessing.get_context("fork").Process(
+        target=_publish_forever, args=(state_file.path, state_file.capacity, count))
+    writer.start()
+    reads = 0
+    while writer.is_alive() or reads == 0:
+        version, payload = state_file.read()
+        if payload is None:
+            continue
+        assert payload == bytes([version % 251]) * (1000 + version % 5000)
+        reads += 1
+    writer.join()
+    assert writer.exitcode == 0
+    assert state_file.read()[0] == count
+
+
+def make_alert(i):
+    return server.ScamAlert(
+        title=f"Exploit {i}: ${i}M Lost",
+        description="x" * 300,
+        amount_lost=f"${i}M",
+        source="DeFiSafety",
+        timestamp=datetime(2025, 6, 1) - timedelta(minutes=i),
+        severity="high",
+        link=f"https://example.com/{i}",
+    )
+
+
+@pytest.fixture
+def producer(tmp_path, monkeypatch):
+    state = SharedStateFile(str(tmp_path / "feed"), capacity=64 * 1024)
+    state.open()
+    monkeypatch.setattr(server, "shared_state", state)
+    yield state
+    state.close()
+
+
+def test_followers_get_the_newest_alerts_that_fit(producer):
+    feed = server.ScamAlertFeed(None, None, source_count=1, limit=20)
+    snapshot = feed.load([make_alert(i) for i in range(1, 1001)], [], datetime.utcnow(), datetime.utcnow())
+    assert len(server.encode_shared_state(snapshot, 1000)) > producer.capacity
+
+    server.publish_shared_state(snapshot)
+    version, payload = producer.read()
+    assert version == 1 and len(payload) <= producer.capacity
+
+    follower = server.ScamAlertFeed(None, None, source_count=1, limit=20)
+    original, server.scam_feed = server.scam_feed, follower
+    try:
+        server.apply_shared_state(server.decode_shared_state(payload))
+    finally:
+        server.scam_feed = original
+    loaded = asyncio.run(follower.current())
+    assert loaded.body == snapshot.body
+    assert loaded.etag == snapshot.etag
+    assert 20 <= len(loaded.index) < 1000
+    assert loaded.alerts[0].amount_usd == 1e6
+
+
+def test_external_feed_waits_instead_of_gathering():
+    gathered = []
+
+    async def gather():
+        gathered.append(1)
+        return [make_alert(1)], []
+
+    feed = server.ScamAlertFeed(gather, list, source_count=1, load_timeout=1)
+    feed.external = True
+
+    async def scenario():
+        waiting = asyncio.create_task(feed.current())
+        await asyncio.sleep(0.1)
+        feed.load([make_alert(2)], [], datetime.utcnow(), datetime.utcnow())
+        return await waiting
+
+    assert asyncio.run(scenario()).alerts[0].title == "Exploit 2: $2M Lost"
+    assert gathered == []
+
+    feed = server.ScamAlertFeed(gather, list, source_count=1, load_timeout=0.1)
+    feed.external = True
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(feed.current())
+    assert gathered == []
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import simulation
+from pricing import get_rate_table
+from simulation import PortfolioSimulator
+
+POLICY = {
+    "wallet_value": 10000.0,
+    "wallet_type": "software",
+    "coverage_type": "full",
+    "security_measures": "2fa-only",
+    "duration": "1year",
+}
+
+
+def test_same_seed_same_result_inline_and_pooled():
+    simulator = PortfolioSimulator()
+    table = get_rate_table()
+    inline = simulator.run(table, [POLICY] * 3, 25000, seed=7)
+    with ThreadPoolExecutor(2) as executor:
+        pooled = simulator.run(table, [POLICY] * 3, 25000, seed=7, executor=executor)
+    assert inline == pooled
+
+
+def test_budget_caps_trials_times_policies():
+    simulator = PortfolioSimulator(max_policy_trials=100000)
+    table = get_rate_table()
+    simulator.run(table, [POLICY] * 10, 10000)
+    with pytest.raises(ValueError, match="budget"):
+        simulator.run(table, [POLICY] * 11, 10000)
+    with pytest.raises(ValueError, match="budget"):
+        asyncio.run(simulator.run_async(table, [POLICY] * 11, 10000))
+
+
+def test_cancelling_run_async_drops_queued_shards(monkeypatch):
+    calls = []
+
+    def slow_shard(*args):
+        calls.append(args)
+        time.sleep(0.2)
+        return simulation.np.zeros(args[4])
+
+    monkeypatch.setattr(simulation, "simulate_shard", slow_shard)
+    simulator = PortfolioSimulator()
+
+    async def scenario(executor):
+        task = asyncio.create_task(
+            simulator.run_async(get_rate_table(), [POLICY], 20 * simulation.TRIALS_PER_SHARD, executor=executor))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with ThreadPoolExecutor(1) as executor:
+        asyncio.run(scenario(executor))
+    assert len(calls) == 1
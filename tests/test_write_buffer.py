@@ -0,0 +1,64 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import AutoReconnect
+
+from write_buffer import WriteBehindBuffer
+
+
+class FlakyCollection:
+    """Fails the first ``failures`` insert_many calls, then delegates"""
+
+    def __init__(self, collection, failures):
+        self.collection = collection
+        self.failures = failures
+        self.calls = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise AutoReconnect("connection reset")
+        return await self.collection.insert_many(documents, ordered=ordered)
+
+
+def run_buffer(db, documents):
+    async def scenario():
+        buffer = WriteBehindBuffer(db, batch_size=100, flush_interval=0.01, retry_delay=0)
+        buffer.start()
+        for document in documents:
+            await buffer.put("chat_messages", document)
+        await buffer.close()
+        return buffer
+    return asyncio.run(scenario())
+
+
+def test_batches_reach_the_collection():
+    db = AsyncMongoMockClient()["test_buffer"]
+    buffer = run_buffer(db, [{"id": str(i)} for i in range(250)])
+    assert buffer.written == 250 and buffer.failed == 0
+    assert asyncio.run(db.chat_messages.count_documents({})) == 250
+
+
+def test_failed_flush_is_retried_once():
+    real = AsyncMongoMockClient()["test_buffer"]
+    flaky = FlakyCollection(real.chat_messages, failures=1)
+    buffer = run_buffer({"chat_messages": flaky}, [{"id": str(i)} for i in range(10)])
+    assert (buffer.written, buffer.retried, buffer.failed) == (10, 10, 0)
+    assert asyncio.run(real.chat_messages.count_documents({})) == 10
+
+
+def test_batch_is_dropped_and_counted_after_the_retry_fails():
+    real = AsyncMongoMockClient()["test_buffer"]
+    flaky = FlakyCollection(real.chat_messages, failures=2)
+    buffer = run_buffer({"chat_messages": flaky}, [{"id": str(i)} for i in range(10)])
+    assert (buffer.written, buffer.retried, buffer.failed) == (0, 10, 10)
+
+
+def test_only_unwritten_documents_are_retried():
+    db = AsyncMongoMockClient()["test_buffer"]
+    asyncio.run(db.chat_messages.create_index("id", unique=True))
+    asyncio.run(db.chat_messages.insert_one({"id": "3"}))
+    buffer = run_buffer(db, [{"id": str(i)} for i in range(5)])
+    # The duplicate counts as already stored rather than as a failure
+    assert (buffer.written, buffer.retried, buffer.failed) == (5, 0, 0)
+    assert asyncio.run(db.chat_messages.count_documents({})) == 5